@@ -1,31 +1,156 @@
 # app.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, date, time
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Tuple
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
+from postgrest.utils import SyncClient
+from httpx import Limits
 import io
-import base64
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
-import matplotlib.pyplot as plt
+import os
+import re
 import time
 
+# ============================================
+# ROLES
+# ============================================
+_DELETE_ROLES = frozenset({'Super User', 'Owner'})
+_WITHDRAW_ROLES = frozenset({'Super User', 'Owner'})
+_VENDOR_PAY_ROLES = frozenset({'Super User', 'Owner', 'Accountant'})
+_SHIFT_USER_ROLES = frozenset({'Morning User', 'Evening User', 'Night User'})
+
+# Form choices, in display order
+_USER_ROLES = ('Morning User', 'Evening User', 'Night User', 'Accountant', 'Owner', 'Super User')
+_SHIFTS = ('', 'Morning', 'Evening', 'Night')
+_TXN_TYPES = ('withdrawal', 'investment')
+
+# Default page of list results; report queries pass limit=None for the full range
+_PAGE_SIZE = 100
+# Rows per page in the edit pickers
+_EDIT_PAGE_SIZE = 50
+
+
 # ============================================
 # SUPABASE CONNECTION (Singleton)
 # ============================================
-class SupabaseConnection:
-    _instance: Optional[Client] = None
+@st.cache_resource
+def get_supabase() -> Client:
+    # One client per server process, shared by every rerun and session. All
+    # requests carry the project key; per-user auth must send its own headers
+    # per call, never set them on this shared session.
+    url = st.secrets["SUPABASE_URL"]
+    key = st.secrets["SUPABASE_KEY"]
+    client = create_client(url, key)
+    # supabase-py 2.0 takes no custom HTTP client, so swap the REST session for
+    # one that keeps idle connections open across reruns (httpx default is 5 s)
+    # and multiplexes concurrent sessions' requests over HTTP/2
+    rest = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=rest.base_url,
+        headers=rest.headers,
+        timeout=rest.timeout,
+        limits=Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30),
+        http2=True,
+    )
+    rest.close()
+    return client
 
-    @classmethod
-    def get_client(cls) -> Client:
-        if cls._instance is None:
-            url = st.secrets["SUPABASE_URL"]
-            key = st.secrets["SUPABASE_KEY"]
-            cls._instance = create_client(url, key)
-        return cls._instance
+
+# ============================================
+# CACHED LOOKUPS
+# ============================================
+# Read-heavy lists hit on nearly every rerun. The owning manager clears
+# the cache after any write to the table.
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_users(include_inactive: bool) -> List[Dict]:
+    query = get_supabase().table('users').select('id,username,full_name,role,shift,is_active')
+    if not include_inactive:
+        query = query.eq('is_active', True)
+    return query.order('full_name').execute().data
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_heads(include_inactive: bool) -> List[Dict]:
+    query = get_supabase().table('expense_heads').select('id,head_name,description,is_active')
+    if not include_inactive:
+        query = query.eq('is_active', True)
+    return query.order('head_name').execute().data
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_vendors(include_inactive: bool) -> List[Dict]:
+    query = get_supabase().table('vendors').select('id,vendor_name,contact_person,phone,current_balance,is_active')
+    if not include_inactive:
+        query = query.eq('is_active', True)
+    return query.order('vendor_name').execute().data
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_daily_summary(date_iso: str) -> Dict:
+    return get_supabase().rpc('daily_summary', {'p_date': date_iso}).execute().data or {}
+
+# Rows offered by the edit pickers, cached briefly so typing in a form does
+# not refetch them. Each manager clears its cache after a write. These call
+# the raising fetch_* methods: cache_data does not store an exception, so a
+# failed read is retried on the next rerun instead of cached as "no rows".
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_sales(page: int) -> List[Dict]:
+    return get_sales_mgr().fetch_sales(limit=_EDIT_PAGE_SIZE, page=page, columns='id,sale_date,invoice_number,amount,notes')
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_expenses(page: int) -> List[Dict]:
+    return get_expenses_mgr().fetch_expenses(limit=_EDIT_PAGE_SIZE, page=page,
+                                              columns='id,expense_date,amount,description,...expense_heads(head_name)')
+
+# Latest entries under the sales and expense forms, per shift
+@st.cache_data(ttl=30, show_spinner=False)
+def _shift_sales(shift_id: str) -> List[Dict]:
+    return get_sales_mgr().fetch_sales(shift_id=shift_id, limit=10, columns='sale_date,invoice_number,amount,notes')
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _shift_expenses(shift_id: str) -> List[Dict]:
+    return get_expenses_mgr().fetch_expenses(shift_id=shift_id, limit=10,
+                                              columns='expense_date,amount,description,...expense_heads(head:head_name)')
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_purchases(vendor_id: str, page: int) -> List[Dict]:
+    return get_vendor_mgr().fetch_purchases(vendor_id=vendor_id, limit=_EDIT_PAGE_SIZE, page=page)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_payments(vendor_id: str, page: int) -> List[Dict]:
+    return get_vendor_mgr().fetch_payments(vendor_id=vendor_id, limit=_EDIT_PAGE_SIZE, page=page)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_returns(vendor_id: str, page: int) -> List[Dict]:
+    return get_vendor_mgr().fetch_returns(vendor_id=vendor_id, limit=_EDIT_PAGE_SIZE, page=page)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _recent_transactions(page: int) -> List[Dict]:
+    return get_personal_mgr().fetch_transactions(limit=_EDIT_PAGE_SIZE, page=page)
+
+# Shift picker for admins, built once from the day's open shifts. Keyed on
+# the date so it turns over at midnight; open/close clear it.
+@st.cache_data(ttl=10, show_spinner=False)
+def _open_shift_options(date_iso: str) -> Dict[str, str]:
+    day = date.fromisoformat(date_iso)
+    open_shifts = get_shift_mgr().fetch_shifts_in_date_range(day, day, status='open')
+    return {f"{s['shift_name']} ({s['opening_time']})": s['id'] for s in open_shifts}
+
+# Date-range report queries, keyed on ISO strings so reruns from unrelated
+# widgets on the page reuse the last result.
+@st.cache_data(ttl=30, show_spinner=False)
+def _vendor_ledger(vendor_id: str, start_iso: str, end_iso: str) -> pd.DataFrame:
+    # Cached as a frame so reruns skip the from_records build as well
+    ledger = get_vendor_mgr().fetch_vendor_ledger(vendor_id, date.fromisoformat(start_iso), date.fromisoformat(end_iso))
+    return pd.DataFrame.from_records(ledger, columns=_LEDGER_COLS)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _expenses_report(start_iso: str, end_iso: str) -> pd.DataFrame:
+    return get_reports_mgr().fetch_expenses_report(date.fromisoformat(start_iso), date.fromisoformat(end_iso))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _personal_transactions(start_iso: str, end_iso: str) -> List[Dict]:
+    return get_personal_mgr().fetch_transactions(start_date=date.fromisoformat(start_iso), end_date=date.fromisoformat(end_iso),
+                                                 limit=None)
 
 
 # ============================================
@@ -33,12 +158,12 @@ class SupabaseConnection:
 # ============================================
 class UserManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def authenticate(self, username: str, password: str) -> Optional[Dict]:
         try:
             response = self.supabase.table('users')\
-                .select('*')\
+                .select('id,username,full_name,role,shift,is_active')\
                 .eq('username', username)\
                 .eq('password', password)\
                 .eq('is_active', True)\
@@ -50,39 +175,32 @@ class UserManager:
 
     def get_all_users(self, include_inactive: bool = False) -> List[Dict]:
         try:
-            query = self.supabase.table('users').select('*')
-            if not include_inactive:
-                query = query.eq('is_active', True)
-            response = query.order('full_name').execute()
-            return response.data
+            return _fetch_users(include_inactive)
         except Exception as e:
             st.error(f"Error fetching users: {e}")
             return []
 
     def create_user(self, user_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
-            existing = self.supabase.table('users')\
-                .select('id')\
-                .eq('username', user_data['username'])\
-                .execute()
-            if existing.data:
-                return False, "Username already exists."
-
             user_data['created_by'] = created_by
-            user_data['created_at'] = datetime.now().isoformat()
-            user_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('users').insert(user_data).execute()
+            self.supabase.table('users').insert(user_data, returning='minimal').execute()
+            _fetch_users.clear()
             return True, "User created successfully."
+        except APIError as e:
+            # users.username is UNIQUE; 23505 is Postgres' unique_violation
+            if e.code == '23505':
+                return False, "Username already exists."
+            return False, f"Error creating user: {e}"
         except Exception as e:
             return False, f"Error creating user: {e}"
 
     def update_user(self, user_id: str, user_data: Dict) -> Tuple[bool, str]:
         try:
-            user_data['updated_at'] = datetime.now().isoformat()
             self.supabase.table('users')\
-                .update(user_data)\
+                .update(user_data, returning='minimal')\
                 .eq('id', user_id)\
                 .execute()
+            _fetch_users.clear()
             return True, "User updated successfully."
         except Exception as e:
             return False, f"Error updating user: {e}"
@@ -90,9 +208,10 @@ class UserManager:
     def deactivate_user(self, user_id: str) -> Tuple[bool, str]:
         try:
             self.supabase.table('users')\
-                .update({'is_active': False, 'updated_at': datetime.now().isoformat()})\
+                .update({'is_active': False}, returning='minimal')\
                 .eq('id', user_id)\
                 .execute()
+            _fetch_users.clear()
             return True, "User deactivated successfully."
         except Exception as e:
             return False, f"Error deactivating user: {e}"
@@ -100,9 +219,10 @@ class UserManager:
     def reactivate_user(self, user_id: str) -> Tuple[bool, str]:
         try:
             self.supabase.table('users')\
-                .update({'is_active': True, 'updated_at': datetime.now().isoformat()})\
+                .update({'is_active': True}, returning='minimal')\
                 .eq('id', user_id)\
                 .execute()
+            _fetch_users.clear()
             return True, "User reactivated successfully."
         except Exception as e:
             return False, f"Error reactivating user: {e}"
@@ -112,21 +232,21 @@ class UserManager:
         role = user['role']
         if role == 'Super User' or role == 'Accountant':
             return True
-        if role in ['Morning User', 'Evening User', 'Night User']:
+        if role in _SHIFT_USER_ROLES:
             return user.get('shift') == target_shift
         return False
 
     @staticmethod
     def can_delete(user: Dict) -> bool:
-        return user['role'] in ['Super User', 'Owner']
+        return user['role'] in _DELETE_ROLES
 
     @staticmethod
     def can_manage_withdrawals(user: Dict) -> bool:
-        return user['role'] in ['Super User', 'Owner']
+        return user['role'] in _WITHDRAW_ROLES
 
     @staticmethod
     def can_manage_vendor_payments(user: Dict) -> bool:
-        return user['role'] in ['Super User', 'Owner', 'Accountant']
+        return user['role'] in _VENDOR_PAY_ROLES
 
 
 # ============================================
@@ -134,9 +254,14 @@ class UserManager:
 # ============================================
 class ShiftManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def get_current_shift(self, shift_name: str) -> Optional[Dict]:
+        # Memoised per session for a few seconds; open/close drop the entry
+        key = f'_cs_{shift_name}'
+        cached = st.session_state.get(key)
+        if cached and time.time() - cached[1] < 5:
+            return cached[0]
         try:
             response = self.supabase.table('shifts')\
                 .select('*')\
@@ -145,68 +270,69 @@ class ShiftManager:
                 .order('opening_date', desc=True)\
                 .limit(1)\
                 .execute()
-            return response.data[0] if response.data else None
+            shift = response.data[0] if response.data else None
+            st.session_state[key] = (shift, time.time())
+            return shift
         except Exception as e:
             st.error(f"Error fetching current shift: {e}")
             return None
 
     def open_shift(self, shift_name: str, opened_by: str) -> Tuple[bool, str, Optional[Dict]]:
         try:
+            # Always check against the database before opening
+            st.session_state.pop(f'_cs_{shift_name}', None)
             if self.get_current_shift(shift_name):
                 return False, f"{shift_name} shift is already open.", None
 
+            now = datetime.now()
             data = {
                 'shift_name': shift_name,
-                'opening_date': date.today().isoformat(),
-                'opening_time': datetime.now().time().isoformat(),
+                'opening_date': now.date().isoformat(),
+                'opening_time': now.time().isoformat(),
                 'opening_cash': 10000.00,
                 'opened_by': opened_by,
                 'status': 'open'
             }
             response = self.supabase.table('shifts').insert(data).execute()
+            st.session_state.pop(f'_cs_{shift_name}', None)
+            _open_shift_options.clear()
             return True, f"{shift_name} shift opened successfully.", response.data[0]
         except Exception as e:
             return False, f"Error opening shift: {e}", None
 
     def close_shift(self, shift_id: str, closing_cash: float, closed_by: str) -> Tuple[bool, str, Optional[Dict]]:
         try:
-            shift_resp = self.supabase.table('shifts').select('*').eq('id', shift_id).execute()
-            if not shift_resp.data:
-                return False, "Shift not found.", None
-
             expected = self.calculate_expected_cash(shift_id)
             difference = closing_cash - expected
 
+            now = datetime.now()
             update_data = {
-                'closing_date': date.today().isoformat(),
-                'closing_time': datetime.now().time().isoformat(),
+                'closing_date': now.date().isoformat(),
+                'closing_time': now.time().isoformat(),
                 'closing_cash': closing_cash,
                 'expected_cash': expected,
                 'cash_difference': difference,
                 'closed_by': closed_by,
-                'status': 'closed',
-                'updated_at': datetime.now().isoformat()
+                'status': 'closed'
             }
             response = self.supabase.table('shifts')\
                 .update(update_data)\
                 .eq('id', shift_id)\
                 .execute()
+            # The update matches no row when the shift does not exist
+            if not response.data:
+                return False, "Shift not found.", None
+            st.session_state.pop(f"_cs_{response.data[0]['shift_name']}", None)
+            _open_shift_options.clear()
             return True, f"Shift closed. Difference: PKR {difference:,.2f}", response.data[0]
         except Exception as e:
             return False, f"Error closing shift: {e}", None
 
     def calculate_expected_cash(self, shift_id: str) -> float:
         try:
-            shift = self.supabase.table('shifts').select('opening_cash').eq('id', shift_id).execute()
-            opening = shift.data[0]['opening_cash'] if shift.data else 10000.0
-
-            sales = sum(s['amount'] for s in self.supabase.table('sales').select('amount').eq('shift_id', shift_id).execute().data)
-            expenses = sum(e['amount'] for e in self.supabase.table('expenses').select('amount').eq('shift_id', shift_id).execute().data)
-            payments = sum(p['amount'] for p in self.supabase.table('vendor_payments').select('amount').eq('shift_id', shift_id).execute().data)
-            withdrawals = sum(w['amount'] for w in self.supabase.table('personal_transactions').select('amount').eq('shift_id', shift_id).eq('transaction_type', 'withdrawal').execute().data)
-            investments = sum(i['amount'] for i in self.supabase.table('personal_transactions').select('amount').eq('shift_id', shift_id).eq('transaction_type', 'investment').execute().data)
-
-            return opening + sales - expenses - payments - withdrawals + investments
+            # Reads the trigger-maintained shift_totals row (see supabase/migrations)
+            response = self.supabase.rpc('shift_expected_cash', {'p_shift_id': shift_id}).execute()
+            return float(response.data or 0)
         except Exception as e:
             st.error(f"Error calculating expected cash: {e}")
             return 0.0
@@ -215,50 +341,62 @@ class ShiftManager:
         summary = {'sales': 0, 'expenses': 0, 'vendor_purchases': 0,
                    'vendor_payments': 0, 'withdrawals': 0, 'investments': 0}
         try:
-            summary['sales'] = sum(s['amount'] for s in self.supabase.table('sales').select('amount').eq('shift_id', shift_id).execute().data)
-            summary['expenses'] = sum(e['amount'] for e in self.supabase.table('expenses').select('amount').eq('shift_id', shift_id).execute().data)
-            summary['vendor_purchases'] = sum(p['amount'] for p in self.supabase.table('vendor_purchases').select('amount').eq('shift_id', shift_id).execute().data)
-            summary['vendor_payments'] = sum(p['amount'] for p in self.supabase.table('vendor_payments').select('amount').eq('shift_id', shift_id).execute().data)
-            for p in self.supabase.table('personal_transactions').select('transaction_type,amount').eq('shift_id', shift_id).execute().data:
-                if p['transaction_type'] == 'withdrawal':
-                    summary['withdrawals'] += p['amount']
-                else:
-                    summary['investments'] += p['amount']
+            response = self.supabase.rpc('shift_summary', {'p_shift_id': shift_id}).execute()
+            if response.data:
+                summary.update(response.data)
             return summary
         except Exception as e:
             st.error(f"Error getting shift summary: {e}")
             return summary
 
-    def get_shifts_in_date_range(self, start_date: date, end_date: date, user: Dict = None) -> List[Dict]:
+    def get_dashboard(self, shift_name: str) -> Dict:
+        # Open shift, expected cash, summary and latest sales in one round trip
         try:
-            query = self.supabase.table('shifts')\
-                .select('*, opened_by_user:opened_by(full_name), closed_by_user:closed_by(full_name)')\
-                .gte('opening_date', start_date.isoformat())\
-                .lte('opening_date', end_date.isoformat())\
-                .order('opening_date', desc=True)
-
-            if user and user['role'] in ['Morning User', 'Evening User', 'Night User']:
-                query = query.eq('shift_name', user['shift'])
+            data = self.supabase.rpc('shift_dashboard', {'p_shift_name': shift_name}).execute().data or {}
+            st.session_state[f'_cs_{shift_name}'] = (data.get('current'), time.time())
+            return data
+        except Exception as e:
+            st.error(f"Error loading shift dashboard: {e}")
+            return {}
 
-            return query.execute().data
+    def get_shifts_in_date_range(self, start_date: date, end_date: date, user: Dict = None, status: str = None) -> List[Dict]:
+        try:
+            return self.fetch_shifts_in_date_range(start_date, end_date, user=user, status=status)
         except Exception as e:
             st.error(f"Error fetching shifts: {e}")
             return []
 
+    def fetch_shifts_in_date_range(self, start_date: date, end_date: date, user: Dict = None, status: str = None) -> List[Dict]:
+        query = self.supabase.table('shifts')\
+            .select('*')\
+            .gte('opening_date', start_date.isoformat())\
+            .lte('opening_date', end_date.isoformat())\
+            .order('opening_date', desc=True)
+
+        if user and user['role'] in _SHIFT_USER_ROLES:
+            query = query.eq('shift_name', user['shift'])
+        if status:
+            query = query.eq('status', status)
+
+        shifts = query.execute().data
+        # Resolve opener/closer names from the cached user list instead of embedding
+        names = {u['id']: u['full_name'] for u in _fetch_users(True)}
+        for s in shifts:
+            s['opened_by_name'] = names.get(s.get('opened_by'), '')
+            s['closed_by_name'] = names.get(s.get('closed_by'), '')
+        return shifts
+
 
 # ============================================
 # EXPENSE HEAD MANAGER
 # ============================================
 class ExpenseHeadManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def get_all_heads(self, include_inactive: bool = False) -> List[Dict]:
         try:
-            query = self.supabase.table('expense_heads').select('*')
-            if not include_inactive:
-                query = query.eq('is_active', True)
-            return query.order('head_name').execute().data
+            return _fetch_heads(include_inactive)
         except Exception as e:
             st.error(f"Error fetching expense heads: {e}")
             return []
@@ -266,17 +404,16 @@ class ExpenseHeadManager:
     def create_head(self, head_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             head_data['created_by'] = created_by
-            head_data['created_at'] = datetime.now().isoformat()
-            head_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('expense_heads').insert(head_data).execute()
+            self.supabase.table('expense_heads').insert(head_data, returning='minimal').execute()
+            _fetch_heads.clear()
             return True, "Expense head created."
         except Exception as e:
             return False, f"Error creating expense head: {e}"
 
     def update_head(self, head_id: str, head_data: Dict) -> Tuple[bool, str]:
         try:
-            head_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('expense_heads').update(head_data).eq('id', head_id).execute()
+            self.supabase.table('expense_heads').update(head_data, returning='minimal').eq('id', head_id).execute()
+            _fetch_heads.clear()
             return True, "Expense head updated."
         except Exception as e:
             return False, f"Error updating expense head: {e}"
@@ -284,9 +421,10 @@ class ExpenseHeadManager:
     def toggle_active(self, head_id: str, is_active: bool) -> Tuple[bool, str]:
         try:
             self.supabase.table('expense_heads')\
-                .update({'is_active': is_active, 'updated_at': datetime.now().isoformat()})\
+                .update({'is_active': is_active}, returning='minimal')\
                 .eq('id', head_id)\
                 .execute()
+            _fetch_heads.clear()
             status = "enabled" if is_active else "disabled"
             return True, f"Expense head {status}."
         except Exception as e:
@@ -298,14 +436,11 @@ class ExpenseHeadManager:
 # ============================================
 class VendorManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def get_all_vendors(self, include_inactive: bool = False) -> List[Dict]:
         try:
-            query = self.supabase.table('vendors').select('*')
-            if not include_inactive:
-                query = query.eq('is_active', True)
-            return query.order('vendor_name').execute().data
+            return _fetch_vendors(include_inactive)
         except Exception as e:
             st.error(f"Error fetching vendors: {e}")
             return []
@@ -314,17 +449,19 @@ class VendorManager:
         try:
             vendor_data['current_balance'] = vendor_data.get('opening_balance', 0)
             vendor_data['created_by'] = created_by
-            vendor_data['created_at'] = datetime.now().isoformat()
-            vendor_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendors').insert(vendor_data).execute()
+            self.supabase.table('vendors').insert(vendor_data, returning='minimal').execute()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Vendor created."
         except Exception as e:
             return False, f"Error creating vendor: {e}"
 
     def update_vendor(self, vendor_id: str, vendor_data: Dict) -> Tuple[bool, str]:
         try:
-            vendor_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendors').update(vendor_data).eq('id', vendor_id).execute()
+            self.supabase.table('vendors').update(vendor_data, returning='minimal').eq('id', vendor_id).execute()
+            _fetch_vendors.clear()
+            _vendor_ledger.clear()
+            _fetch_daily_summary.clear()
             return True, "Vendor updated."
         except Exception as e:
             return False, f"Error updating vendor: {e}"
@@ -332,56 +469,78 @@ class VendorManager:
     def toggle_active(self, vendor_id: str, is_active: bool) -> Tuple[bool, str]:
         try:
             self.supabase.table('vendors')\
-                .update({'is_active': is_active, 'updated_at': datetime.now().isoformat()})\
+                .update({'is_active': is_active}, returning='minimal')\
                 .eq('id', vendor_id)\
                 .execute()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             status = "enabled" if is_active else "disabled"
             return True, f"Vendor {status}."
         except Exception as e:
             return False, f"Error toggling vendor: {e}"
 
-    # Purchases
+    # Purchases, payments and returns all move vendors.current_balance,
+    # so each write also drops the cached vendor list.
     def add_purchase(self, purchase_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             purchase_data['created_by'] = created_by
-            purchase_data['created_at'] = datetime.now().isoformat()
-            purchase_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_purchases').insert(purchase_data).execute()
+            self.supabase.table('vendor_purchases').insert(purchase_data, returning='minimal').execute()
+            _recent_purchases.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Purchase added."
         except Exception as e:
             return False, f"Error adding purchase: {e}"
 
-    def get_purchases(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
+    def add_purchases(self, purchases: List[Dict], created_by: str) -> Tuple[bool, str]:
+        # One insert for a batch of invoices; the balance trigger runs per row
         try:
-            query = self.supabase.table('vendor_purchases')\
-                .select('*, vendors(vendor_name), shifts(shift_name)')\
-                .order('purchase_date', desc=True)
-            if vendor_id:
-                query = query.eq('vendor_id', vendor_id)
-            if start_date:
-                query = query.gte('purchase_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('purchase_date', end_date.isoformat())
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
+            rows = [{**p, 'created_by': created_by} for p in purchases]
+            self.supabase.table('vendor_purchases').insert(rows, returning='minimal').execute()
+            _recent_purchases.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
+            return True, f"{len(rows)} purchases added."
         except Exception as e:
-            st.error(f"Error fetching purchases: {e}")
-            return []
+            return False, f"Error adding purchases: {e}"
+
+    def fetch_purchases(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0) -> List[Dict]:
+        # Spread embeds return flat vendor_name / shift_name columns, not nested objects
+        query = self.supabase.table('vendor_purchases')\
+            .select('*, ...vendors(vendor_name), ...shifts(shift_name)')\
+            .order('purchase_date', desc=True)
+        if vendor_id:
+            query = query.eq('vendor_id', vendor_id)
+        if start_date:
+            query = query.gte('purchase_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('purchase_date', end_date.isoformat())
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
 
     def update_purchase(self, purchase_id: str, purchase_data: Dict) -> Tuple[bool, str]:
         try:
-            purchase_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_purchases').update(purchase_data).eq('id', purchase_id).execute()
+            self.supabase.table('vendor_purchases').update(purchase_data, returning='minimal').eq('id', purchase_id).execute()
+            _recent_purchases.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Purchase updated."
         except Exception as e:
             return False, f"Error updating purchase: {e}"
 
     def delete_purchase(self, purchase_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('vendor_purchases').delete().eq('id', purchase_id).execute()
+            self.supabase.table('vendor_purchases').delete(returning='minimal').eq('id', purchase_id).execute()
+            _recent_purchases.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Purchase deleted."
         except Exception as e:
             return False, f"Error deleting purchase: {e}"
@@ -390,44 +549,49 @@ class VendorManager:
     def add_payment(self, payment_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             payment_data['created_by'] = created_by
-            payment_data['created_at'] = datetime.now().isoformat()
-            payment_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_payments').insert(payment_data).execute()
+            self.supabase.table('vendor_payments').insert(payment_data, returning='minimal').execute()
+            _recent_payments.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Payment added."
         except Exception as e:
             return False, f"Error adding payment: {e}"
 
-    def get_payments(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
-        try:
-            query = self.supabase.table('vendor_payments')\
-                .select('*, vendors(vendor_name), shifts(shift_name)')\
-                .order('payment_date', desc=True)
-            if vendor_id:
-                query = query.eq('vendor_id', vendor_id)
-            if start_date:
-                query = query.gte('payment_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('payment_date', end_date.isoformat())
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
-        except Exception as e:
-            st.error(f"Error fetching payments: {e}")
-            return []
+    def fetch_payments(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0) -> List[Dict]:
+        query = self.supabase.table('vendor_payments')\
+            .select('*, ...vendors(vendor_name), ...shifts(shift_name)')\
+            .order('payment_date', desc=True)
+        if vendor_id:
+            query = query.eq('vendor_id', vendor_id)
+        if start_date:
+            query = query.gte('payment_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('payment_date', end_date.isoformat())
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
 
     def update_payment(self, payment_id: str, payment_data: Dict) -> Tuple[bool, str]:
         try:
-            payment_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_payments').update(payment_data).eq('id', payment_id).execute()
+            self.supabase.table('vendor_payments').update(payment_data, returning='minimal').eq('id', payment_id).execute()
+            _recent_payments.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Payment updated."
         except Exception as e:
             return False, f"Error updating payment: {e}"
 
     def delete_payment(self, payment_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('vendor_payments').delete().eq('id', payment_id).execute()
+            self.supabase.table('vendor_payments').delete(returning='minimal').eq('id', payment_id).execute()
+            _recent_payments.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Payment deleted."
         except Exception as e:
             return False, f"Error deleting payment: {e}"
@@ -436,44 +600,49 @@ class VendorManager:
     def add_return(self, return_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             return_data['created_by'] = created_by
-            return_data['created_at'] = datetime.now().isoformat()
-            return_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_returns').insert(return_data).execute()
+            self.supabase.table('vendor_returns').insert(return_data, returning='minimal').execute()
+            _recent_returns.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Return recorded. Vendor balance reduced."
         except Exception as e:
             return False, f"Error adding return: {e}"
 
-    def get_returns(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
-        try:
-            query = self.supabase.table('vendor_returns')\
-                .select('*, vendors(vendor_name), shifts(shift_name)')\
-                .order('return_date', desc=True)
-            if vendor_id:
-                query = query.eq('vendor_id', vendor_id)
-            if start_date:
-                query = query.gte('return_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('return_date', end_date.isoformat())
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
-        except Exception as e:
-            st.error(f"Error fetching returns: {e}")
-            return []
+    def fetch_returns(self, vendor_id: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0) -> List[Dict]:
+        query = self.supabase.table('vendor_returns')\
+            .select('*, ...vendors(vendor_name), ...shifts(shift_name)')\
+            .order('return_date', desc=True)
+        if vendor_id:
+            query = query.eq('vendor_id', vendor_id)
+        if start_date:
+            query = query.gte('return_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('return_date', end_date.isoformat())
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
 
     def update_return(self, return_id: str, return_data: Dict) -> Tuple[bool, str]:
         try:
-            return_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('vendor_returns').update(return_data).eq('id', return_id).execute()
+            self.supabase.table('vendor_returns').update(return_data, returning='minimal').eq('id', return_id).execute()
+            _recent_returns.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Return updated."
         except Exception as e:
             return False, f"Error updating return: {e}"
 
     def delete_return(self, return_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('vendor_returns').delete().eq('id', return_id).execute()
+            self.supabase.table('vendor_returns').delete(returning='minimal').eq('id', return_id).execute()
+            _recent_returns.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Return deleted."
         except Exception as e:
             return False, f"Error deleting return: {e}"
@@ -481,78 +650,32 @@ class VendorManager:
     # Vendor Ledger (includes purchases, payments, returns)
     def get_vendor_ledger(self, vendor_id: str, start_date: date, end_date: date) -> List[Dict]:
         try:
-            purchases = self.supabase.table('vendor_purchases')\
-                .select('purchase_date as date, amount, invoice_number, notes, shifts(shift_name)')\
-                .eq('vendor_id', vendor_id)\
-                .gte('purchase_date', start_date.isoformat())\
-                .lte('purchase_date', end_date.isoformat())\
-                .execute().data
-            payments = self.supabase.table('vendor_payments')\
-                .select('payment_date as date, amount, notes, shifts(shift_name)')\
-                .eq('vendor_id', vendor_id)\
-                .gte('payment_date', start_date.isoformat())\
-                .lte('payment_date', end_date.isoformat())\
-                .execute().data
-            returns = self.supabase.table('vendor_returns')\
-                .select('return_date as date, amount, reason as notes, shifts(shift_name)')\
-                .eq('vendor_id', vendor_id)\
-                .gte('return_date', start_date.isoformat())\
-                .lte('return_date', end_date.isoformat())\
-                .execute().data
-
-            ledger = []
-            for p in purchases:
-                ledger.append({
-                    'date': p['date'],
-                    'type': 'Purchase',
-                    'invoice': p.get('invoice_number', ''),
-                    'debit': p['amount'],
-                    'credit': 0,
-                    'notes': p.get('notes', ''),
-                    'shift': p['shifts']['shift_name'] if p['shifts'] else ''
-                })
-            for p in payments:
-                ledger.append({
-                    'date': p['date'],
-                    'type': 'Payment',
-                    'invoice': '',
-                    'debit': 0,
-                    'credit': p['amount'],
-                    'notes': p.get('notes', ''),
-                    'shift': p['shifts']['shift_name'] if p['shifts'] else ''
-                })
-            for r in returns:
-                ledger.append({
-                    'date': r['date'],
-                    'type': 'Return',
-                    'invoice': '',
-                    'debit': 0,  # Return reduces balance, so treat as credit
-                    'credit': r['amount'],
-                    'notes': f"Return: {r.get('notes', '')}",
-                    'shift': r['shifts']['shift_name'] if r['shifts'] else ''
-                })
-
-            ledger.sort(key=lambda x: x['date'])
-
-            vendor_resp = self.supabase.table('vendors').select('opening_balance').eq('id', vendor_id).execute()
-            opening = vendor_resp.data[0]['opening_balance'] if vendor_resp.data else 0
-
-            balance = opening
-            for entry in ledger:
-                balance = balance + entry['debit'] - entry['credit']
-                entry['balance'] = balance
-
-            ledger.reverse()
-            return ledger
+            return self.fetch_vendor_ledger(vendor_id=vendor_id, start_date=start_date, end_date=end_date)
         except Exception as e:
             st.error(f"Error fetching vendor ledger: {e}")
             return []
 
+    def fetch_vendor_ledger(self, vendor_id: str, start_date: date, end_date: date) -> List[Dict]:
+        # Merge, ordering and running balance happen in vendor_ledger() (UNION ALL + window SUM)
+        ledger = self.supabase.rpc('vendor_ledger', {
+            'p_vendor_id': vendor_id,
+            'p_start': start_date.isoformat(),
+            'p_end': end_date.isoformat()
+        }).execute().data
+        ledger.reverse()
+        return ledger
+
     def delete_transaction(self, table: str, transaction_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table(table).delete().eq('id', transaction_id).execute()
+            self.supabase.table(table).delete(returning='minimal').eq('id', transaction_id).execute()
+            _recent_purchases.clear()
+            _recent_payments.clear()
+            _recent_returns.clear()
+            _vendor_ledger.clear()
+            _fetch_vendors.clear()
+            _fetch_daily_summary.clear()
             return True, "Transaction deleted."
         except Exception as e:
             return False, f"Error deleting transaction: {e}"
@@ -563,58 +686,66 @@ class VendorManager:
 # ============================================
 class PersonalLedgerManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def add_transaction(self, trans_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             trans_data['created_by'] = created_by
-            trans_data['created_at'] = datetime.now().isoformat()
-            trans_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('personal_transactions').insert(trans_data).execute()
+            self.supabase.table('personal_transactions').insert(trans_data, returning='minimal').execute()
+            _recent_transactions.clear()
+            _personal_transactions.clear()
+            _fetch_daily_summary.clear()
             return True, f"{trans_data['transaction_type'].capitalize()} added."
         except Exception as e:
             return False, f"Error adding transaction: {e}"
 
-    def get_transactions(self, trans_type: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
+    def get_transactions(self, trans_type: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0) -> List[Dict]:
         try:
-            query = self.supabase.table('personal_transactions')\
-                .select('*, shifts(shift_name), users(full_name)')\
-                .order('transaction_date', desc=True)
-            if trans_type:
-                query = query.eq('transaction_type', trans_type)
-            if start_date:
-                query = query.gte('transaction_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('transaction_date', end_date.isoformat())
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
+            return self.fetch_transactions(trans_type=trans_type, start_date=start_date, end_date=end_date, limit=limit, page=page)
         except Exception as e:
             st.error(f"Error fetching personal transactions: {e}")
             return []
 
+    def fetch_transactions(self, trans_type: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0) -> List[Dict]:
+        query = self.supabase.table('personal_transactions')\
+            .select('*, ...shifts(shift_name), users(full_name)')\
+            .order('transaction_date', desc=True)
+        if trans_type:
+            query = query.eq('transaction_type', trans_type)
+        if start_date:
+            query = query.gte('transaction_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('transaction_date', end_date.isoformat())
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
+
     def update_transaction(self, trans_id: str, trans_data: Dict) -> Tuple[bool, str]:
         try:
-            trans_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('personal_transactions').update(trans_data).eq('id', trans_id).execute()
+            self.supabase.table('personal_transactions').update(trans_data, returning='minimal').eq('id', trans_id).execute()
+            _recent_transactions.clear()
+            _personal_transactions.clear()
+            _fetch_daily_summary.clear()
             return True, "Transaction updated."
         except Exception as e:
             return False, f"Error updating transaction: {e}"
 
     def get_balance(self) -> float:
         try:
-            inv = sum(i['amount'] for i in self.supabase.table('personal_transactions').select('amount').eq('transaction_type', 'investment').execute().data)
-            wd = sum(w['amount'] for w in self.supabase.table('personal_transactions').select('amount').eq('transaction_type', 'withdrawal').execute().data)
-            return inv - wd
+            response = self.supabase.rpc('personal_balance', {}).execute()
+            return float(response.data or 0)
         except Exception as e:
             st.error(f"Error calculating personal balance: {e}")
             return 0.0
 
     def delete_transaction(self, transaction_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('personal_transactions').delete().eq('id', transaction_id).execute()
+            self.supabase.table('personal_transactions').delete(returning='minimal').eq('id', transaction_id).execute()
+            _recent_transactions.clear()
+            _personal_transactions.clear()
+            _fetch_daily_summary.clear()
             return True, "Transaction deleted."
         except Exception as e:
             return False, f"Error deleting transaction: {e}"
@@ -625,10 +756,7 @@ class PersonalLedgerManager:
 # ============================================
 class ReportsManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
-        self.shift_mgr = ShiftManager()
-        self.vendor_mgr = VendorManager()
-        self.personal_mgr = PersonalLedgerManager()
+        self.supabase = get_supabase()
 
     def get_daily_summary(self, report_date: date) -> Dict:
         summary = {
@@ -642,25 +770,12 @@ class ReportsManager:
             'personal_balance': 0
         }
         try:
-            summary['total_sales'] = sum(s['amount'] for s in self.supabase.table('sales').select('amount').eq('sale_date', report_date.isoformat()).execute().data)
-            summary['total_expenses'] = sum(e['amount'] for e in self.supabase.table('expenses').select('amount').eq('expense_date', report_date.isoformat()).execute().data)
-            summary['vendor_payments'] = sum(p['amount'] for p in self.supabase.table('vendor_payments').select('amount').eq('payment_date', report_date.isoformat()).execute().data)
-
-            for p in self.supabase.table('personal_transactions').select('transaction_type,amount').eq('transaction_date', report_date.isoformat()).execute().data:
-                if p['transaction_type'] == 'withdrawal':
-                    summary['withdrawals'] += p['amount']
-                else:
-                    summary['investments'] += p['amount']
-
+            # Cached for a minute; writes that feed the totals clear it
+            summary.update(_fetch_daily_summary(report_date.isoformat()))
             summary['net_cash'] = (summary['total_sales'] - summary['total_expenses'] -
                                    summary['vendor_payments'] - summary['withdrawals'] +
                                    summary['investments'])
 
-            vendors = self.vendor_mgr.get_all_vendors(include_inactive=False)
-            summary['vendor_payable'] = sum(v['current_balance'] for v in vendors if v['current_balance'] > 0)
-
-            summary['personal_balance'] = self.personal_mgr.get_balance()
-
             return summary
         except Exception as e:
             st.error(f"Error generating daily summary: {e}")
@@ -669,13 +784,15 @@ class ReportsManager:
     def get_sales_report(self, start_date: date, end_date: date, user: Dict = None) -> pd.DataFrame:
         try:
             query = self.supabase.table('sales')\
-                .select('*, shifts(shift_name), users(full_name)')\
+                .select('sale_date,sale_time,invoice_number,amount,notes,created_by,...shifts(shift:shift_name)')\
                 .gte('sale_date', start_date.isoformat())\
                 .lte('sale_date', end_date.isoformat())\
                 .order('sale_date', desc=True)
             df = pd.DataFrame(query.execute().data)
-            if not df.empty and 'shifts' in df.columns:
-                df['shift'] = df['shifts'].apply(lambda x: x['shift_name'] if x else '')
+            if not df.empty:
+                # Users are already cached; map ids here instead of joining per row
+                users = {u['id']: u['full_name'] for u in _fetch_users(True)}
+                df['full_name'] = df.pop('created_by').map(users)
             return df
         except Exception as e:
             st.error(f"Error fetching sales report: {e}")
@@ -683,30 +800,27 @@ class ReportsManager:
 
     def get_expenses_report(self, start_date: date, end_date: date) -> pd.DataFrame:
         try:
-            response = self.supabase.table('expenses')\
-                .select('*, expense_heads(head_name), shifts(shift_name), users(full_name)')\
-                .gte('expense_date', start_date.isoformat())\
-                .lte('expense_date', end_date.isoformat())\
-                .order('expense_date', desc=True)\
-                .execute()
-            df = pd.DataFrame(response.data)
-            if not df.empty:
-                if 'expense_heads' in df.columns:
-                    df['head_name'] = df['expense_heads'].apply(lambda x: x['head_name'] if x else '')
-                if 'shifts' in df.columns:
-                    df['shift'] = df['shifts'].apply(lambda x: x['shift_name'] if x else '')
-            return df
+            return self.fetch_expenses_report(start_date=start_date, end_date=end_date)
         except Exception as e:
             st.error(f"Error fetching expenses report: {e}")
             return pd.DataFrame()
 
-    def get_vendor_ledger_report(self, vendor_id: str, start_date: date, end_date: date) -> pd.DataFrame:
-        ledger = self.vendor_mgr.get_vendor_ledger(vendor_id, start_date, end_date)
-        return pd.DataFrame(ledger)
-
-    def get_personal_ledger_report(self, start_date: date, end_date: date) -> pd.DataFrame:
-        trans = self.personal_mgr.get_transactions(start_date=start_date, end_date=end_date)
-        return pd.DataFrame(trans)
+    def fetch_expenses_report(self, start_date: date, end_date: date) -> pd.DataFrame:
+        response = self.supabase.table('expenses')\
+            .select('expense_date,expense_time,amount,description,expense_head_id,created_by,...shifts(shift:shift_name)')\
+            .gte('expense_date', start_date.isoformat())\
+            .lte('expense_date', end_date.isoformat())\
+            .order('expense_date', desc=True)\
+            .execute()
+        df = pd.DataFrame(response.data)
+        if not df.empty:
+            # Heads and users are already cached; map ids here instead of joining per row
+            heads = {h['id']: h['head_name'] for h in _fetch_heads(True)}
+            users = {u['id']: u['full_name'] for u in _fetch_users(True)}
+            # Few distinct heads, so the report filter compares category codes
+            df['head_name'] = df.pop('expense_head_id').map(heads).astype('category')
+            df['full_name'] = df.pop('created_by').map(users)
+        return df
 
 
 # ============================================
@@ -714,48 +828,51 @@ class ReportsManager:
 # ============================================
 class SalesManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def add_sale(self, sale_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             sale_data['created_by'] = created_by
-            sale_data['created_at'] = datetime.now().isoformat()
-            sale_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('sales').insert(sale_data).execute()
+            self.supabase.table('sales').insert(sale_data, returning='minimal').execute()
+            _recent_sales.clear()
+            _shift_sales.clear()
+            _fetch_daily_summary.clear()
             return True, "Sale added."
         except Exception as e:
             return False, f"Error adding sale: {e}"
 
-    def get_sales(self, shift_id: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
-        try:
-            query = self.supabase.table('sales').select('*, shifts(shift_name)')
-            if shift_id:
-                query = query.eq('shift_id', shift_id)
-            if start_date:
-                query = query.gte('sale_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('sale_date', end_date.isoformat())
-            query = query.order('sale_date', desc=True)
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
-        except Exception as e:
-            st.error(f"Error fetching sales: {e}")
-            return []
+    def fetch_sales(self, shift_id: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0,
+                    columns: str = '*, shifts(shift_name)') -> List[Dict]:
+        query = self.supabase.table('sales').select(columns)
+        if shift_id:
+            query = query.eq('shift_id', shift_id)
+        if start_date:
+            query = query.gte('sale_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('sale_date', end_date.isoformat())
+        query = query.order('sale_date', desc=True)
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
 
     def update_sale(self, sale_id: str, sale_data: Dict) -> Tuple[bool, str]:
         try:
-            sale_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('sales').update(sale_data).eq('id', sale_id).execute()
+            self.supabase.table('sales').update(sale_data, returning='minimal').eq('id', sale_id).execute()
+            _recent_sales.clear()
+            _shift_sales.clear()
+            _fetch_daily_summary.clear()
             return True, "Sale updated."
         except Exception as e:
             return False, f"Error updating sale: {e}"
 
     def delete_sale(self, sale_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('sales').delete().eq('id', sale_id).execute()
+            self.supabase.table('sales').delete(returning='minimal').eq('id', sale_id).execute()
+            _recent_sales.clear()
+            _shift_sales.clear()
+            _fetch_daily_summary.clear()
             return True, "Sale deleted."
         except Exception as e:
             return False, f"Error deleting sale: {e}"
@@ -766,78 +883,143 @@ class SalesManager:
 # ============================================
 class ExpensesManager:
     def __init__(self):
-        self.supabase = SupabaseConnection.get_client()
+        self.supabase = get_supabase()
 
     def add_expense(self, expense_data: Dict, created_by: str) -> Tuple[bool, str]:
         try:
             expense_data['created_by'] = created_by
-            expense_data['created_at'] = datetime.now().isoformat()
-            expense_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('expenses').insert(expense_data).execute()
+            self.supabase.table('expenses').insert(expense_data, returning='minimal').execute()
+            _recent_expenses.clear()
+            _shift_expenses.clear()
+            _expenses_report.clear()
+            _fetch_daily_summary.clear()
             return True, "Expense added."
         except Exception as e:
             return False, f"Error adding expense: {e}"
 
-    def get_expenses(self, shift_id: str = None, start_date: date = None, end_date: date = None, limit: int = None) -> List[Dict]:
-        try:
-            query = self.supabase.table('expenses').select('*, expense_heads(head_name), shifts(shift_name)')
-            if shift_id:
-                query = query.eq('shift_id', shift_id)
-            if start_date:
-                query = query.gte('expense_date', start_date.isoformat())
-            if end_date:
-                query = query.lte('expense_date', end_date.isoformat())
-            query = query.order('expense_date', desc=True)
-            if limit:
-                query = query.limit(limit)
-            return query.execute().data
-        except Exception as e:
-            st.error(f"Error fetching expenses: {e}")
-            return []
+    def fetch_expenses(self, shift_id: str = None, start_date: date = None, end_date: date = None, limit: Optional[int] = _PAGE_SIZE, page: int = 0,
+                       columns: str = '*, expense_heads(head_name), shifts(shift_name)') -> List[Dict]:
+        query = self.supabase.table('expenses').select(columns)
+        if shift_id:
+            query = query.eq('shift_id', shift_id)
+        if start_date:
+            query = query.gte('expense_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('expense_date', end_date.isoformat())
+        query = query.order('expense_date', desc=True)
+        if limit:
+            query = query.range(page * limit, (page + 1) * limit - 1)
+        return query.execute().data
 
     def update_expense(self, expense_id: str, expense_data: Dict) -> Tuple[bool, str]:
         try:
-            expense_data['updated_at'] = datetime.now().isoformat()
-            self.supabase.table('expenses').update(expense_data).eq('id', expense_id).execute()
+            self.supabase.table('expenses').update(expense_data, returning='minimal').eq('id', expense_id).execute()
+            _recent_expenses.clear()
+            _shift_expenses.clear()
+            _expenses_report.clear()
+            _fetch_daily_summary.clear()
             return True, "Expense updated."
         except Exception as e:
             return False, f"Error updating expense: {e}"
 
     def delete_expense(self, expense_id: str, user_role: str) -> Tuple[bool, str]:
-        if user_role not in ['Super User', 'Owner']:
+        if user_role not in _DELETE_ROLES:
             return False, "Permission denied."
         try:
-            self.supabase.table('expenses').delete().eq('id', expense_id).execute()
+            self.supabase.table('expenses').delete(returning='minimal').eq('id', expense_id).execute()
+            _recent_expenses.clear()
+            _shift_expenses.clear()
+            _expenses_report.clear()
+            _fetch_daily_summary.clear()
             return True, "Expense deleted."
         except Exception as e:
             return False, f"Error deleting expense: {e}"
 
 
+# ============================================
+# MANAGER INSTANCES
+# ============================================
+# Built once per process: each instance keeps the client it captured in
+# __init__ and holds no per-user state, so one serves every rerun and session.
+@st.cache_resource
+def get_user_mgr() -> UserManager:
+    return UserManager()
+
+@st.cache_resource
+def get_shift_mgr() -> ShiftManager:
+    return ShiftManager()
+
+@st.cache_resource
+def get_head_mgr() -> ExpenseHeadManager:
+    return ExpenseHeadManager()
+
+@st.cache_resource
+def get_vendor_mgr() -> VendorManager:
+    return VendorManager()
+
+@st.cache_resource
+def get_personal_mgr() -> PersonalLedgerManager:
+    return PersonalLedgerManager()
+
+@st.cache_resource
+def get_reports_mgr() -> ReportsManager:
+    return ReportsManager()
+
+@st.cache_resource
+def get_sales_mgr() -> SalesManager:
+    return SalesManager()
+
+@st.cache_resource
+def get_expenses_mgr() -> ExpensesManager:
+    return ExpensesManager()
+
+
 # ============================================
 # PDF GENERATION FUNCTIONS
 # ============================================
 def generate_pdf(dataframe: pd.DataFrame, title: str, filename: str) -> bytes:
+    # Settings are passed in so a change on the PDF Settings page misses the cache,
+    # and the minute-stamp so a re-export never shows a stale "Generated:" time
+    return _render_pdf(dataframe, title, dict(st.session_state.pdf_settings),
+                       datetime.now().strftime('%Y-%m-%d %H:%M'))
+
+# Streamlit hashes the frame, so re-exporting the same rows reuses the bytes
+@st.cache_data(show_spinner=False, max_entries=20)
+def _render_pdf(dataframe: pd.DataFrame, title: str, cfg: Dict, generated: str) -> bytes:
+    # Imported here so app start-up does not pay for reportlab until an export
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.platypus import LongTable, SimpleDocTemplate, TableStyle
+
     buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    primary = st.session_state.pdf_settings['primary_color']
-    secondary = st.session_state.pdf_settings['secondary_color']
-    font_size = st.session_state.pdf_settings['font_size']
-    company = st.session_state.pdf_settings['company_name']
-
-    c.setFont("Helvetica-Bold", 16)
-    c.setFillColor(colors.HexColor(primary))
-    c.drawString(50, height - 50, company)
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica", 12)
-    c.drawString(50, height - 70, title)
-    c.drawString(50, height - 85, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-
-    data = [dataframe.columns.tolist()] + dataframe.values.tolist()
-    table = Table(data)
+    _, height = A4
+
+    primary = colors.HexColor(cfg['primary_color'])
+    secondary = colors.HexColor(cfg['secondary_color'])
+    font_size = cfg['font_size']
+    company = cfg['company_name']
+
+    def draw_header(c, doc):
+        c.saveState()
+        c.setFont("Helvetica-Bold", 16)
+        c.setFillColor(primary)
+        c.drawString(50, height - 50, company)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 12)
+        c.drawString(50, height - 70, title)
+        c.drawString(50, height - 85, f"Generated: {generated}")
+        c.restoreState()
+
+    # Format numeric columns in one NumPy pass rather than a str() per cell
+    numeric = dataframe.select_dtypes('number').columns
+    dataframe = dataframe.assign(**{col: np.char.mod('%.2f', dataframe[col].to_numpy(dtype=float)) for col in numeric})
+
+    # LongTable splits across pages and repeats the header row on each one
+    data = [dataframe.columns.tolist()]
+    data.extend(list(row) for row in dataframe.itertuples(index=False, name=None))
+    table = LongTable(data, repeatRows=1)
     table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor(secondary)),
+        ('BACKGROUND', (0,0), (-1,0), secondary),
         ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
         ('ALIGN', (0,0), (-1,-1), 'CENTER'),
         ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
@@ -847,17 +1029,11 @@ def generate_pdf(dataframe: pd.DataFrame, title: str, filename: str) -> bytes:
         ('GRID', (0,0), (-1,-1), 1, colors.black)
     ]))
 
-    table.wrapOn(c, width-100, height)
-    table.drawOn(c, 50, height - 200 - len(data)*20)
-
-    c.save()
-    buffer.seek(0)
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=50, rightMargin=50,
+                            topMargin=100, bottomMargin=50, title=title)
+    doc.build([table], onFirstPage=draw_header, onLaterPages=draw_header)
     return buffer.getvalue()
 
-def get_pdf_download_link(pdf_bytes: bytes, filename: str) -> str:
-    b64 = base64.b64encode(pdf_bytes).decode()
-    return f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}" style="text-decoration: none; background-color: #3b82f6; color: white; padding: 0.5rem 1rem; border-radius: 8px; display: inline-block;">📥 Download PDF</a>'
-
 
 # ============================================
 # PAGE CONFIG & CUSTOM CSS
@@ -869,164 +1045,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS: Black sidebar with white text, white main area
-st.markdown("""
-<style>
-    /* Main content area background white */
-    .main {
-        background-color: #ffffff;
-        padding: 1rem 2rem;
-    }
-    
-    /* Sidebar background black */
-    section[data-testid="stSidebar"] {
-        background-color: #000000 !important;
-        padding: 1.5rem 1rem;
-    }
-    
-    /* Sidebar text color white */
-    section[data-testid="stSidebar"] .stMarkdown,
-    section[data-testid="stSidebar"] .stSelectbox label,
-    section[data-testid="stSidebar"] .stSelectbox div,
-    section[data-testid="stSidebar"] p,
-    section[data-testid="stSidebar"] h1,
-    section[data-testid="stSidebar"] h2,
-    section[data-testid="stSidebar"] h3 {
-        color: white !important;
-    }
-    
-    /* Sidebar selectbox styling */
-    section[data-testid="stSidebar"] div[data-baseweb="select"] > div {
-        background-color: #333333;
-        border-color: #555555;
-        color: white;
-    }
-    section[data-testid="stSidebar"] div[data-baseweb="select"] > div:hover {
-        border-color: #888888;
-    }
-    section[data-testid="stSidebar"] .stSelectbox svg {
-        fill: white;
-    }
-    
-    /* Sidebar button (logout) */
-    section[data-testid="stSidebar"] .stButton > button {
-        background-color: #333333;
-        color: white;
-        border: 1px solid #555555;
-    }
-    section[data-testid="stSidebar"] .stButton > button:hover {
-        background-color: #444444;
-        border-color: #777777;
-    }
-    
-    /* User info card in sidebar */
-    .sidebar-user-card {
-        background: #1a1a1a;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-bottom: 1rem;
-        border: 1px solid #333333;
-        color: white;
-    }
-    .sidebar-user-card p {
-        margin: 0;
-        color: #dddddd;
-    }
-    .sidebar-user-card .name {
-        color: white;
-        font-weight: 600;
-    }
-    
-    /* Divider in sidebar */
-    hr {
-        border-color: #333333;
-    }
-    
-    /* Rest of the styles (previous) */
-    h1, h2, h3 {
-        color: #0f172a;
-        font-weight: 600;
-    }
-    div[data-testid="stMetricValue"] {
-        font-size: 2rem;
-        font-weight: 700;
-        color: #0f172a;
-    }
-    div[data-testid="stMetricLabel"] {
-        font-size: 0.9rem;
-        font-weight: 500;
-        color: #64748b;
-    }
-    .stButton > button {
-        background-color: #3b82f6;
-        color: white;
-        border-radius: 8px;
-        border: none;
-        padding: 0.5rem 1rem;
-        font-weight: 500;
-        transition: all 0.2s;
-        width: 100%;
-    }
-    .stButton > button:hover {
-        background-color: #2563eb;
-        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-    }
-    .stForm {
-        background-color: white;
-        padding: 2rem;
-        border-radius: 12px;
-        box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1);
-        border: 1px solid #e2e8f0;
-        margin-bottom: 2rem;
-    }
-    .dataframe {
-        border-radius: 8px;
-        overflow: hidden;
-        border: 1px solid #e2e8f0;
-    }
-    .dataframe th {
-        background-color: #f1f5f9;
-        color: #0f172a;
-        font-weight: 600;
-        padding: 0.75rem !important;
-    }
-    .dataframe td {
-        padding: 0.75rem !important;
-        border-bottom: 1px solid #e2e8f0;
-    }
-    .streamlit-expanderHeader {
-        background-color: white;
-        border-radius: 8px;
-        border: 1px solid #e2e8f0;
-        padding: 0.75rem 1rem;
-        font-weight: 600;
-        color: #0f172a;
-    }
-    .streamlit-expanderContent {
-        background-color: white;
-        border-radius: 0 0 8px 8px;
-        border: 1px solid #e2e8f0;
-        border-top: none;
-        padding: 1rem;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 1rem;
-    }
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 8px 8px 0 0;
-        padding: 0.5rem 1rem;
-        font-weight: 500;
-    }
-    .stAlert {
-        border-radius: 8px;
-        border-left-width: 4px;
-    }
-    div[data-baseweb="select"] > div {
-        border-radius: 8px;
-        border: 1px solid #e2e8f0;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS: Black sidebar with white text, white main area.
+# It has to be emitted on every rerun (Streamlit drops elements a rerun does
+# not repeat), so comments and whitespace are stripped once to shrink it.
+@st.cache_data(show_spinner=False)
+def _load_css() -> str:
+    with open(os.path.join(os.path.dirname(__file__), 'styles.css')) as f:
+        css = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', css).strip()
+
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
 
 
 # ============================================
@@ -1057,7 +1086,7 @@ def login():
             password = st.text_input("Password", type="password", placeholder="Enter your password")
             submitted = st.form_submit_button("Login", use_container_width=True)
             if submitted:
-                um = UserManager()
+                um = get_user_mgr()
                 user = um.authenticate(username, password)
                 if user:
                     st.session_state.authenticated = True
@@ -1077,76 +1106,70 @@ def logout():
 # ============================================
 # SIDEBAR NAVIGATION
 # ============================================
+# Sidebar label -> page, per role; built once at import
+_SHIFT_MENU = {
+    "🏠 My Shift": "My Shift",
+    "💰 Sales Entry": "Sales Entry",
+    "💸 Expense Entry": "Expense Entry"
+}
+_MENU_MAPS = {
+    'Super User': {
+        "🏠 Dashboard": "Dashboard",
+        "👥 User Management": "User Management",
+        "🕒 Shift Management": "Shift Management",
+        "💰 Sales Entry": "Sales Entry",
+        "📋 Expense Heads": "Expense Heads",
+        "💸 Expense Entry": "Expense Entry",
+        "🏢 Vendor Master": "Vendor Master",
+        "📒 Vendor Ledger": "Vendor Ledger",
+        "💳 Personal Ledger": "Personal Ledger",
+        "📊 Reports": "Reports",
+        "📈 Profit & Loss": "Profit & Loss",
+        "🖨️ PDF Settings": "PDF Settings"
+    },
+    'Owner': {
+        "🏠 Dashboard": "Dashboard",
+        "🕒 Shift Management": "Shift Management",
+        "💰 Sales Entry": "Sales Entry",
+        "📋 Expense Heads": "Expense Heads",
+        "💸 Expense Entry": "Expense Entry",
+        "🏢 Vendor Master": "Vendor Master",
+        "📒 Vendor Ledger": "Vendor Ledger",
+        "💳 Personal Ledger": "Personal Ledger",
+        "📊 Reports": "Reports",
+        "📈 Profit & Loss": "Profit & Loss",
+        "🖨️ PDF Settings": "PDF Settings"
+    },
+    'Accountant': {
+        "🏠 Dashboard": "Dashboard",
+        "🕒 Shift Management": "Shift Management",
+        "💰 Sales Entry": "Sales Entry",
+        "📋 Expense Heads": "Expense Heads",
+        "💸 Expense Entry": "Expense Entry",
+        "🏢 Vendor Master": "Vendor Master",
+        "📒 Vendor Ledger": "Vendor Ledger",
+        "📊 Reports": "Reports",
+        "📈 Profit & Loss": "Profit & Loss"
+    },
+    **{role: _SHIFT_MENU for role in _SHIFT_USER_ROLES},
+}
+_MENU_LABELS = {role: tuple(menu) for role, menu in _MENU_MAPS.items()}
+
 def sidebar_navigation():
     with st.sidebar:
-        st.markdown("""
-        <div style="text-align: center; margin-bottom: 2rem;">
-            <h2 style="color: white; margin-bottom: 0;">💊 Pharmacy ERP</h2>
-            <p style="color: #cccccc; font-size: 0.9rem;">Cash & Ledger</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.subheader("💊 Pharmacy ERP")
+        st.caption("Cash & Ledger")
 
         user = st.session_state.user
-        st.markdown(f"""
-        <div class="sidebar-user-card">
-            <p class="name">👤 {user['full_name']}</p>
-            <p>{user['role']}</p>
-            {f"<p style='color: #3b82f6;'>Shift: {user['shift']}</p>" if user.get('shift') else ""}
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            card = f"**👤 {user['full_name']}**  \n{user['role']}"
+            if user.get('shift'):
+                card += f"  \nShift: {user['shift']}"
+            st.markdown(card)
 
-        role = user['role']
-        menu_map = {}
-
-        if role == 'Super User':
-            menu_map = {
-                "🏠 Dashboard": "Dashboard",
-                "👥 User Management": "User Management",
-                "🕒 Shift Management": "Shift Management",
-                "💰 Sales Entry": "Sales Entry",
-                "📋 Expense Heads": "Expense Heads",
-                "💸 Expense Entry": "Expense Entry",
-                "🏢 Vendor Master": "Vendor Master",
-                "📒 Vendor Ledger": "Vendor Ledger",
-                "💳 Personal Ledger": "Personal Ledger",
-                "📊 Reports": "Reports",
-                "📈 Profit & Loss": "Profit & Loss",
-                "🖨️ PDF Settings": "PDF Settings"
-            }
-        elif role == 'Owner':
-            menu_map = {
-                "🏠 Dashboard": "Dashboard",
-                "🕒 Shift Management": "Shift Management",
-                "💰 Sales Entry": "Sales Entry",
-                "📋 Expense Heads": "Expense Heads",
-                "💸 Expense Entry": "Expense Entry",
-                "🏢 Vendor Master": "Vendor Master",
-                "📒 Vendor Ledger": "Vendor Ledger",
-                "💳 Personal Ledger": "Personal Ledger",
-                "📊 Reports": "Reports",
-                "📈 Profit & Loss": "Profit & Loss",
-                "🖨️ PDF Settings": "PDF Settings"
-            }
-        elif role == 'Accountant':
-            menu_map = {
-                "🏠 Dashboard": "Dashboard",
-                "🕒 Shift Management": "Shift Management",
-                "💰 Sales Entry": "Sales Entry",
-                "📋 Expense Heads": "Expense Heads",
-                "💸 Expense Entry": "Expense Entry",
-                "🏢 Vendor Master": "Vendor Master",
-                "📒 Vendor Ledger": "Vendor Ledger",
-                "📊 Reports": "Reports",
-                "📈 Profit & Loss": "Profit & Loss"
-            }
-        elif role in ['Morning User', 'Evening User', 'Night User']:
-            menu_map = {
-                "🏠 My Shift": "My Shift",
-                "💰 Sales Entry": "Sales Entry",
-                "💸 Expense Entry": "Expense Entry"
-            }
+        menu_map = _MENU_MAPS.get(user['role'], {})
 
-        selected_label = st.selectbox("Navigation", list(menu_map.keys()), key="nav_select")
+        selected_label = st.selectbox("Navigation", _MENU_LABELS.get(user['role'], ()), key="nav_select")
         st.session_state.page = menu_map[selected_label]
 
         st.divider()
@@ -1154,20 +1177,79 @@ def sidebar_navigation():
             logout()
 
 
+# ============================================
+# TABLE COLUMNS
+# ============================================
+# Columns shown in the page tables
+_RECENT_SALE_COLS = ('sale_date', 'invoice_number', 'amount')
+_SALE_COLS = ('sale_date', 'invoice_number', 'amount', 'notes')
+_USER_COLS = ('username', 'full_name', 'role', 'shift', 'is_active')
+_HEAD_COLS = ('head_name', 'description', 'is_active')
+_EXPENSE_COLS = ('expense_date', 'head', 'amount', 'description')
+_VENDOR_COLS = ('vendor_name', 'contact_person', 'phone', 'current_balance', 'is_active')
+_TRANSACTION_COLS = ('transaction_date', 'transaction_type', 'amount', 'description')
+_LEDGER_COLS = ('date', 'type', 'invoice', 'debit', 'credit', 'notes', 'shift', 'balance')
+_SHIFT_COLS = ('opening_date', 'shift_name', 'status', 'opening_time', 'opened_by_name', 'opening_cash',
+               'closing_date', 'closing_time', 'closed_by_name', 'closing_cash', 'expected_cash', 'cash_difference')
+
+# Ledgers can run to thousands of rows; only the newest are sent to the
+# browser and the full table is offered as a CSV download.
+_DISPLAY_ROWS = 200
+
+def _show_ledger(df: pd.DataFrame, filename: str):
+    st.dataframe(df.head(_DISPLAY_ROWS), use_container_width=True, hide_index=True)
+    if len(df) > _DISPLAY_ROWS:
+        st.caption(f"Showing {_DISPLAY_ROWS} of {len(df)} rows.")
+        st.download_button("📥 Download full CSV", df.to_csv(index=False).encode(),
+                           file_name=filename, mime="text/csv")
+
+# Selectboxes put every option in the DOM; long lists get a search box and
+# a cap. An empty search result returns [], so callers render no action.
+_PICKER_LIMIT = 50
+
+def _narrow(rows: List[Dict], field: str, key: str) -> List[Dict]:
+    if len(rows) <= _PICKER_LIMIT:
+        return rows
+    q = st.text_input("Search", key=key).strip().lower()
+    if q:
+        rows = [r for r in rows if q in r[field].lower()]
+        if not rows:
+            st.caption("No matches.")
+    if len(rows) > _PICKER_LIMIT:
+        st.caption(f"Showing {_PICKER_LIMIT} of {len(rows)} — type to search.")
+    return rows[:_PICKER_LIMIT]
+
+# Edit pickers read their page before fetching and draw the input afterwards,
+# so a short page can cap it at the last one. One short page needs no input.
+def _page_input(key: str, page: int, rows: List[Dict]):
+    last = page if len(rows) < _EDIT_PAGE_SIZE else None
+    if page == 0 and last is not None:
+        return
+    st.number_input("Page", min_value=0, max_value=last, step=1, key=key)
+    if rows and last is not None:
+        st.caption("Last page.")
+
+
 # ============================================
 # EDIT FUNCTIONS (Reusable)
 # ============================================
 def edit_sale():
     st.subheader("✏️ Edit Sale")
-    sales_mgr = SalesManager()
-    sales = sales_mgr.get_sales(limit=50)
+    sales_mgr = get_sales_mgr()
+    page = st.session_state.get("edit_sale_page", 0)
+    try:
+        sales = _recent_sales(page)
+    except Exception as e:
+        st.error(f"Error fetching sales: {e}")
+        return
+    _page_input("edit_sale_page", page, sales)
     if not sales:
         st.info("No sales to edit.")
         return
-    sale_dict = {f"{s['sale_date']} - {s['invoice_number']} (PKR {s['amount']})": s['id'] for s in sales}
-    selected = st.selectbox("Select Sale to Edit", list(sale_dict.keys()))
-    sale_id = sale_dict[selected]
-    sale = next(s for s in sales if s['id'] == sale_id)
+    labels = [f"{s['sale_date']} - {s['invoice_number']} (PKR {s['amount']})" for s in sales]
+    idx = st.selectbox("Select Sale to Edit", range(len(labels)), format_func=labels.__getitem__)
+    sale = sales[idx]
+    sale_id = sale['id']
 
     with st.form("edit_sale_form"):
         col1, col2 = st.columns(2)
@@ -1175,7 +1257,7 @@ def edit_sale():
             invoice = st.text_input("Invoice Number", value=sale.get('invoice_number', ''))
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(sale['amount']), step=100.0, format="%.2f")
         with col2:
-            sale_date = st.date_input("Date", value=datetime.strptime(sale['sale_date'], '%Y-%m-%d').date())
+            sale_date = st.date_input("Date", value=date.fromisoformat(sale['sale_date']))
             notes = st.text_area("Notes", value=sale.get('notes', ''))
         submitted = st.form_submit_button("Update Sale")
         if submitted:
@@ -1186,8 +1268,7 @@ def edit_sale():
                     'invoice_number': invoice,
                     'amount': amount,
                     'sale_date': sale_date.isoformat(),
-                    'notes': notes,
-                    'updated_at': datetime.now().isoformat()
+                    'notes': notes
                 }
                 success, msg = sales_mgr.update_sale(sale_id, data)
                 if success:
@@ -1198,28 +1279,36 @@ def edit_sale():
 
 def edit_expense():
     st.subheader("✏️ Edit Expense")
-    exp_mgr = ExpensesManager()
-    ehm = ExpenseHeadManager()
-    expenses = exp_mgr.get_expenses(limit=50)
+    exp_mgr = get_expenses_mgr()
+    ehm = get_head_mgr()
+    page = st.session_state.get("edit_expense_page", 0)
+    try:
+        expenses = _recent_expenses(page)
+    except Exception as e:
+        st.error(f"Error fetching expenses: {e}")
+        return
+    _page_input("edit_expense_page", page, expenses)
     if not expenses:
         st.info("No expenses to edit.")
         return
-    exp_dict = {f"{e['expense_date']} - {e.get('expense_heads', {}).get('head_name', 'Unknown')} (PKR {e['amount']})": e['id'] for e in expenses}
-    selected = st.selectbox("Select Expense to Edit", list(exp_dict.keys()))
-    exp_id = exp_dict[selected]
-    expense = next(e for e in expenses if e['id'] == exp_id)
+    labels = [f"{e['expense_date']} - {e.get('head_name') or 'Unknown'} (PKR {e['amount']})" for e in expenses]
+    idx = st.selectbox("Select Expense to Edit", range(len(labels)), format_func=labels.__getitem__)
+    expense = expenses[idx]
+    exp_id = expense['id']
 
     heads = ehm.get_all_heads(include_inactive=False)
+    head_names = [h['head_name'] for h in heads]
     head_dict = {h['head_name']: h['id'] for h in heads}
-    current_head = expense.get('expense_heads', {}).get('head_name', '')
+    head_idx = {name: i for i, name in enumerate(head_names)}
+    current_head = expense.get('head_name') or ''
 
     with st.form("edit_expense_form"):
         col1, col2 = st.columns(2)
         with col1:
-            head = st.selectbox("Expense Head", list(head_dict.keys()), index=list(head_dict.keys()).index(current_head) if current_head in head_dict else 0)
+            head = st.selectbox("Expense Head", head_names, index=head_idx.get(current_head, 0))
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(expense['amount']), step=100.0, format="%.2f")
         with col2:
-            exp_date = st.date_input("Date", value=datetime.strptime(expense['expense_date'], '%Y-%m-%d').date())
+            exp_date = st.date_input("Date", value=date.fromisoformat(expense['expense_date']))
             description = st.text_area("Description", value=expense.get('description', ''))
         submitted = st.form_submit_button("Update Expense")
         if submitted:
@@ -1230,8 +1319,7 @@ def edit_expense():
                     'expense_head_id': head_dict[head],
                     'amount': amount,
                     'expense_date': exp_date.isoformat(),
-                    'description': description,
-                    'updated_at': datetime.now().isoformat()
+                    'description': description
                 }
                 success, msg = exp_mgr.update_expense(exp_id, data)
                 if success:
@@ -1242,15 +1330,21 @@ def edit_expense():
 
 def edit_purchase(vendor_id):
     st.subheader("✏️ Edit Purchase")
-    vm = VendorManager()
-    purchases = vm.get_purchases(vendor_id=vendor_id, limit=50)
+    vm = get_vendor_mgr()
+    page = st.session_state.get("edit_purchase_page", 0)
+    try:
+        purchases = _recent_purchases(vendor_id, page)
+    except Exception as e:
+        st.error(f"Error fetching purchases: {e}")
+        return
+    _page_input("edit_purchase_page", page, purchases)
     if not purchases:
         st.info("No purchases to edit.")
         return
-    purch_dict = {f"{p['purchase_date']} - {p.get('invoice_number', 'No Invoice')} (PKR {p['amount']})": p['id'] for p in purchases}
-    selected = st.selectbox("Select Purchase to Edit", list(purch_dict.keys()))
-    purch_id = purch_dict[selected]
-    purchase = next(p for p in purchases if p['id'] == purch_id)
+    labels = [f"{p['purchase_date']} - {p.get('invoice_number', 'No Invoice')} (PKR {p['amount']})" for p in purchases]
+    idx = st.selectbox("Select Purchase to Edit", range(len(labels)), format_func=labels.__getitem__)
+    purchase = purchases[idx]
+    purch_id = purchase['id']
 
     with st.form("edit_purchase_form"):
         col1, col2 = st.columns(2)
@@ -1258,8 +1352,8 @@ def edit_purchase(vendor_id):
             invoice = st.text_input("Invoice Number", value=purchase.get('invoice_number', ''))
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(purchase['amount']), step=100.0, format="%.2f")
         with col2:
-            pdate = st.date_input("Date", value=datetime.strptime(purchase['purchase_date'], '%Y-%m-%d').date())
-            due = st.date_input("Due Date", value=datetime.strptime(purchase['due_date'], '%Y-%m-%d').date() if purchase.get('due_date') else None)
+            pdate = st.date_input("Date", value=date.fromisoformat(purchase['purchase_date']))
+            due = st.date_input("Due Date", value=date.fromisoformat(purchase['due_date']) if purchase.get('due_date') else None)
             notes = st.text_area("Notes", value=purchase.get('notes', ''))
         submitted = st.form_submit_button("Update Purchase")
         if submitted:
@@ -1271,8 +1365,7 @@ def edit_purchase(vendor_id):
                     'amount': amount,
                     'purchase_date': pdate.isoformat(),
                     'due_date': due.isoformat() if due else None,
-                    'notes': notes,
-                    'updated_at': datetime.now().isoformat()
+                    'notes': notes
                 }
                 success, msg = vm.update_purchase(purch_id, data)
                 if success:
@@ -1283,22 +1376,28 @@ def edit_purchase(vendor_id):
 
 def edit_payment(vendor_id):
     st.subheader("✏️ Edit Payment")
-    vm = VendorManager()
-    payments = vm.get_payments(vendor_id=vendor_id, limit=50)
+    vm = get_vendor_mgr()
+    page = st.session_state.get("edit_payment_page", 0)
+    try:
+        payments = _recent_payments(vendor_id, page)
+    except Exception as e:
+        st.error(f"Error fetching payments: {e}")
+        return
+    _page_input("edit_payment_page", page, payments)
     if not payments:
         st.info("No payments to edit.")
         return
-    pay_dict = {f"{p['payment_date']} (PKR {p['amount']})": p['id'] for p in payments}
-    selected = st.selectbox("Select Payment to Edit", list(pay_dict.keys()))
-    pay_id = pay_dict[selected]
-    payment = next(p for p in payments if p['id'] == pay_id)
+    labels = [f"{p['payment_date']} (PKR {p['amount']})" for p in payments]
+    idx = st.selectbox("Select Payment to Edit", range(len(labels)), format_func=labels.__getitem__)
+    payment = payments[idx]
+    pay_id = payment['id']
 
     with st.form("edit_payment_form"):
         col1, col2 = st.columns(2)
         with col1:
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(payment['amount']), step=100.0, format="%.2f")
         with col2:
-            pdate = st.date_input("Date", value=datetime.strptime(payment['payment_date'], '%Y-%m-%d').date())
+            pdate = st.date_input("Date", value=date.fromisoformat(payment['payment_date']))
             notes = st.text_area("Notes", value=payment.get('notes', ''))
         submitted = st.form_submit_button("Update Payment")
         if submitted:
@@ -1308,8 +1407,7 @@ def edit_payment(vendor_id):
                 data = {
                     'amount': amount,
                     'payment_date': pdate.isoformat(),
-                    'notes': notes,
-                    'updated_at': datetime.now().isoformat()
+                    'notes': notes
                 }
                 success, msg = vm.update_payment(pay_id, data)
                 if success:
@@ -1320,22 +1418,28 @@ def edit_payment(vendor_id):
 
 def edit_return(vendor_id):
     st.subheader("✏️ Edit Return")
-    vm = VendorManager()
-    returns = vm.get_returns(vendor_id=vendor_id, limit=50)
+    vm = get_vendor_mgr()
+    page = st.session_state.get("edit_return_page", 0)
+    try:
+        returns = _recent_returns(vendor_id, page)
+    except Exception as e:
+        st.error(f"Error fetching returns: {e}")
+        return
+    _page_input("edit_return_page", page, returns)
     if not returns:
         st.info("No returns to edit.")
         return
-    ret_dict = {f"{r['return_date']} (PKR {r['amount']})": r['id'] for r in returns}
-    selected = st.selectbox("Select Return to Edit", list(ret_dict.keys()))
-    ret_id = ret_dict[selected]
-    ret = next(r for r in returns if r['id'] == ret_id)
+    labels = [f"{r['return_date']} (PKR {r['amount']})" for r in returns]
+    idx = st.selectbox("Select Return to Edit", range(len(labels)), format_func=labels.__getitem__)
+    ret = returns[idx]
+    ret_id = ret['id']
 
     with st.form("edit_return_form"):
         col1, col2 = st.columns(2)
         with col1:
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(ret['amount']), step=100.0, format="%.2f")
         with col2:
-            rdate = st.date_input("Date", value=datetime.strptime(ret['return_date'], '%Y-%m-%d').date())
+            rdate = st.date_input("Date", value=date.fromisoformat(ret['return_date']))
             reason = st.text_area("Reason", value=ret.get('reason', ''))
         submitted = st.form_submit_button("Update Return")
         if submitted:
@@ -1345,8 +1449,7 @@ def edit_return(vendor_id):
                 data = {
                     'amount': amount,
                     'return_date': rdate.isoformat(),
-                    'reason': reason,
-                    'updated_at': datetime.now().isoformat()
+                    'reason': reason
                 }
                 success, msg = vm.update_return(ret_id, data)
                 if success:
@@ -1357,23 +1460,29 @@ def edit_return(vendor_id):
 
 def edit_personal_transaction():
     st.subheader("✏️ Edit Personal Transaction")
-    plm = PersonalLedgerManager()
-    trans = plm.get_transactions(limit=50)
+    plm = get_personal_mgr()
+    page = st.session_state.get("edit_personal_page", 0)
+    try:
+        trans = _recent_transactions(page)
+    except Exception as e:
+        st.error(f"Error fetching transactions: {e}")
+        return
+    _page_input("edit_personal_page", page, trans)
     if not trans:
         st.info("No transactions to edit.")
         return
-    trans_dict = {f"{t['transaction_date']} - {t['transaction_type']} (PKR {t['amount']})": t['id'] for t in trans}
-    selected = st.selectbox("Select Transaction to Edit", list(trans_dict.keys()))
-    trans_id = trans_dict[selected]
-    tran = next(t for t in trans if t['id'] == trans_id)
+    labels = [f"{t['transaction_date']} - {t['transaction_type']} (PKR {t['amount']})" for t in trans]
+    idx = st.selectbox("Select Transaction to Edit", range(len(labels)), format_func=labels.__getitem__)
+    tran = trans[idx]
+    trans_id = tran['id']
 
     with st.form("edit_personal_form"):
         col1, col2 = st.columns(2)
         with col1:
             amount = st.number_input("Amount (PKR)", min_value=0.0, value=float(tran['amount']), step=100.0, format="%.2f")
-            trans_type = st.selectbox("Type", ['withdrawal', 'investment'], index=0 if tran['transaction_type']=='withdrawal' else 1)
+            trans_type = st.selectbox("Type", _TXN_TYPES, index=0 if tran['transaction_type']=='withdrawal' else 1)
         with col2:
-            tdate = st.date_input("Date", value=datetime.strptime(tran['transaction_date'], '%Y-%m-%d').date())
+            tdate = st.date_input("Date", value=date.fromisoformat(tran['transaction_date']))
             description = st.text_area("Description", value=tran.get('description', ''))
         submitted = st.form_submit_button("Update Transaction")
         if submitted:
@@ -1384,8 +1493,7 @@ def edit_personal_transaction():
                     'amount': amount,
                     'transaction_type': trans_type,
                     'transaction_date': tdate.isoformat(),
-                    'description': description,
-                    'updated_at': datetime.now().isoformat()
+                    'description': description
                 }
                 success, msg = plm.update_transaction(trans_id, data)
                 if success:
@@ -1403,21 +1511,22 @@ def show_dashboard():
     user = st.session_state.user
     role = user['role']
 
-    if role in ['Morning User', 'Evening User', 'Night User']:
-        shift_mgr = ShiftManager()
-        current = shift_mgr.get_current_shift(user['shift'])
+    if role in _SHIFT_USER_ROLES:
+        shift_mgr = get_shift_mgr()
+        dashboard = shift_mgr.get_dashboard(user['shift'])
+        current = dashboard.get('current')
         if current:
             st.subheader(f"Current {user['shift']} Shift")
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Opening Cash", f"PKR {current['opening_cash']:,.2f}")
             with col2:
-                expected = shift_mgr.calculate_expected_cash(current['id'])
+                expected = float(dashboard['expected'] or 0)
                 st.metric("Expected Cash", f"PKR {expected:,.2f}")
             with col3:
                 st.metric("Status", current['status'].upper())
 
-            summary = shift_mgr.get_shift_summary(current['id'])
+            summary = dashboard['summary']
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric("Sales", f"PKR {summary['sales']:,.2f}")
@@ -1428,18 +1537,17 @@ def show_dashboard():
             with col4:
                 st.metric("Net", f"PKR {summary['sales'] - summary['expenses'] - summary['vendor_payments']:,.2f}")
 
-            sales_mgr = SalesManager()
-            recent = sales_mgr.get_sales(shift_id=current['id'], limit=5)
+            recent = dashboard['recent_sales']
             if recent:
                 st.subheader("Recent Sales")
-                df = pd.DataFrame(recent)
-                st.dataframe(df[['sale_date', 'invoice_number', 'amount']], use_container_width=True, hide_index=True)
+                df = pd.DataFrame.from_records(recent, columns=_RECENT_SALE_COLS)
+                st.dataframe(df, use_container_width=True, hide_index=True)
             else:
                 st.info("No recent sales.")
         else:
             st.warning(f"No open {user['shift']} shift. Please open a shift from Shift Management.")
     else:
-        reports = ReportsManager()
+        reports = get_reports_mgr()
         today = date.today()
         summary = reports.get_daily_summary(today)
 
@@ -1461,13 +1569,17 @@ def show_dashboard():
             st.metric("Drawer Opening", "PKR 10,000.00")
 
         st.subheader("Recent Activity")
-        sales_mgr = SalesManager()
-        recent = sales_mgr.get_sales(limit=10)
-        if recent:
-            df = pd.DataFrame(recent)
-            st.dataframe(df[['sale_date', 'invoice_number', 'amount']], use_container_width=True, hide_index=True)
+        # First page of the edit picker's cache; sales writes clear it
+        try:
+            recent = _recent_sales(0)[:10]
+        except Exception as e:
+            st.error(f"Error fetching sales: {e}")
         else:
-            st.info("No recent sales.")
+            if recent:
+                df = pd.DataFrame.from_records(recent, columns=_RECENT_SALE_COLS)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+            else:
+                st.info("No recent sales.")
 
 
 # ============================================
@@ -1475,7 +1587,7 @@ def show_dashboard():
 # ============================================
 def show_user_management():
     st.header("👥 User Management")
-    um = UserManager()
+    um = get_user_mgr()
     users = um.get_all_users(include_inactive=True)
 
     with st.expander("➕ Add New User", expanded=False):
@@ -1486,8 +1598,8 @@ def show_user_management():
                 password = st.text_input("Password*", type="password")
                 full_name = st.text_input("Full Name*")
             with col2:
-                role = st.selectbox("Role*", ['Morning User', 'Evening User', 'Night User', 'Accountant', 'Owner', 'Super User'])
-                shift = st.selectbox("Shift", ['', 'Morning', 'Evening', 'Night'])
+                role = st.selectbox("Role*", _USER_ROLES)
+                shift = st.selectbox("Shift", _SHIFTS)
                 if shift == '':
                     shift = None
             submitted = st.form_submit_button("Create User", use_container_width=True)
@@ -1510,100 +1622,36 @@ def show_user_management():
                         st.error(msg)
 
     if users:
-        df = pd.DataFrame(users)
-        st.dataframe(df[['username', 'full_name', 'role', 'shift', 'is_active']], use_container_width=True, hide_index=True)
-
-        with st.form("manage_user"):
-            user_options = {u['username']: u['id'] for u in users}
-            selected = st.selectbox("Select User", list(user_options.keys()))
-            user_id = user_options[selected]
-            selected_user = next(u for u in users if u['id'] == user_id)
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.form_submit_button("Deactivate"):
-                    if selected_user['id'] == st.session_state.user['id']:
-                        st.error("Cannot deactivate yourself.")
-                    else:
-                        success, msg = um.deactivate_user(user_id)
-                        st.success(msg) if success else st.error(msg)
-                        st.rerun()
-            with col2:
-                if st.form_submit_button("Reactivate"):
-                    success, msg = um.reactivate_user(user_id)
-                    st.success(msg) if success else st.error(msg)
-                        st.rerun()
-    else:
-        st.info("No users found.")
-
-
-# ============================================
-# SHIFT MANAGEMENT
-# ============================================
-def show_user_management():
-    st.header("👥 User Management")
-    um = UserManager()
-    users = um.get_all_users(include_inactive=True)
-
-    with st.expander("➕ Add New User", expanded=False):
-        with st.form("add_user_form"):
-            col1, col2 = st.columns(2)
-            with col1:
-                username = st.text_input("Username*")
-                password = st.text_input("Password*", type="password")
-                full_name = st.text_input("Full Name*")
-            with col2:
-                role = st.selectbox("Role*", ['Morning User', 'Evening User', 'Night User', 'Accountant', 'Owner', 'Super User'])
-                shift = st.selectbox("Shift", ['', 'Morning', 'Evening', 'Night'])
-                if shift == '':
-                    shift = None
-            submitted = st.form_submit_button("Create User", use_container_width=True)
-            if submitted:
-                if not username or not password or not full_name:
-                    st.error("Please fill all required fields.")
-                else:
-                    data = {
-                        'username': username,
-                        'password': password,
-                        'full_name': full_name,
-                        'role': role,
-                        'shift': shift
-                    }
-                    success, msg = um.create_user(data, st.session_state.user['id'])
-                    if success:
-                        st.success(msg)
-                        st.rerun()
-                    else:
-                        st.error(msg)
+        df = pd.DataFrame.from_records(users, columns=_USER_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
-    if users:
-        df = pd.DataFrame(users)
-        st.dataframe(df[['username', 'full_name', 'role', 'shift', 'is_active']], use_container_width=True, hide_index=True)
-
-        with st.form("manage_user"):
-            user_options = {u['username']: u['id'] for u in users}
-            selected = st.selectbox("Select User", list(user_options.keys()))
-            user_id = user_options[selected]
-            selected_user = next(u for u in users if u['id'] == user_id)
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.form_submit_button("Deactivate"):
-                    if selected_user['id'] == st.session_state.user['id']:
-                        st.error("Cannot deactivate yourself.")
-                    else:
-                        success, msg = um.deactivate_user(user_id)
+        picks = _narrow(users, 'username', "user_search")
+        if picks:
+            with st.form("manage_user"):
+                labels = [u['username'] for u in picks]
+                idx = st.selectbox("Select User", range(len(labels)), format_func=labels.__getitem__)
+                selected_user = picks[idx]
+                user_id = selected_user['id']
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.form_submit_button("Deactivate"):
+                        if selected_user['id'] == st.session_state.user['id']:
+                            st.error("Cannot deactivate yourself.")
+                        else:
+                            success, msg = um.deactivate_user(user_id)
+                            if success:
+                                st.success(msg)
+                            else:
+                                st.error(msg)
+                            st.rerun()
+                with col2:
+                    if st.form_submit_button("Reactivate"):
+                        success, msg = um.reactivate_user(user_id)
                         if success:
                             st.success(msg)
                         else:
                             st.error(msg)
                         st.rerun()
-            with col2:
-                if st.form_submit_button("Reactivate"):
-                    success, msg = um.reactivate_user(user_id)
-                    if success:
-                        st.success(msg)
-                    else:
-                        st.error(msg)
-                    st.rerun()
     else:
         st.info("No users found.")
 
@@ -1613,45 +1661,52 @@ def show_user_management():
 # ============================================
 def show_sales_entry():
     st.header("💰 Sales Entry")
+    today = date.today()
     user = st.session_state.user
-    shift_mgr = ShiftManager()
-    sales_mgr = SalesManager()
+    shift_mgr = get_shift_mgr()
+    sales_mgr = get_sales_mgr()
 
-    if user['role'] in ['Morning User', 'Evening User', 'Night User']:
+    if user['role'] in _SHIFT_USER_ROLES:
         current = shift_mgr.get_current_shift(user['shift'])
         if not current:
             st.error(f"No open {user['shift']} shift.")
             return
         shift_id = current['id']
+        shift_options = None
     else:
-        today_shifts = shift_mgr.get_shifts_in_date_range(date.today(), date.today())
-        open_shifts = [s for s in today_shifts if s['status'] == 'open']
-        if not open_shifts:
+        try:
+            shift_options = _open_shift_options(today.isoformat())
+        except Exception as e:
+            st.error(f"Error fetching shifts: {e}")
+            return
+        if not shift_options:
             st.error("No open shifts today.")
             return
-        shift_options = {f"{s['shift_name']} ({s['opening_time']})": s['id'] for s in open_shifts}
-        selected = st.selectbox("Select Shift", list(shift_options.keys()))
-        shift_id = shift_options[selected]
 
     # Add Sale Form
     with st.form("sales_form"):
+        # Picked inside the form so switching shift waits for the submit
+        if shift_options:
+            selected = st.selectbox("Select Shift", list(shift_options.keys()))
+            shift_id = shift_options[selected]
         col1, col2 = st.columns(2)
         with col1:
             invoice = st.text_input("Invoice Number (optional)")
             amount = st.number_input("Total Sales (PKR)*", min_value=0.0, step=100.0, format="%.2f")
         with col2:
-            sale_date = st.date_input("Date", value=date.today())
+            sale_date = st.date_input("Date", value=today)
             notes = st.text_area("Notes")
         submitted = st.form_submit_button("Record Sale", use_container_width=True)
         if submitted:
             if amount <= 0:
                 st.error("Amount must be > 0.")
             else:
+                now = datetime.now()
                 data = {
                     'shift_id': shift_id,
-                    'invoice_number': invoice or f"SALE-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                    'invoice_number': invoice or f"SALE-{now.strftime('%Y%m%d%H%M%S')}",
                     'sale_date': sale_date.isoformat(),
-                    'sale_time': datetime.now().time().isoformat(),
+                    'sale_time': now.time().isoformat(),
                     'amount': amount,
                     'notes': notes
                 }
@@ -1664,13 +1719,19 @@ def show_sales_entry():
 
     # Edit Section
     with st.expander("✏️ Edit Existing Sale"):
-        edit_sale()
+        # Expander contents run even when collapsed; only fetch on request
+        if st.checkbox("Load sales for editing", key="edit_sale_on"):
+            edit_sale()
 
     st.subheader("Recent Sales")
-    sales = sales_mgr.get_sales(shift_id=shift_id, limit=10)
+    try:
+        sales = _shift_sales(shift_id)
+    except Exception as e:
+        st.error(f"Error fetching sales: {e}")
+        return
     if sales:
-        df = pd.DataFrame(sales)
-        st.dataframe(df[['sale_date', 'invoice_number', 'amount', 'notes']], use_container_width=True, hide_index=True)
+        df = pd.DataFrame.from_records(sales, columns=_SALE_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
     else:
         st.info("No sales recorded.")
 
@@ -1680,7 +1741,7 @@ def show_sales_entry():
 # ============================================
 def show_expense_heads():
     st.header("📋 Expense Heads")
-    ehm = ExpenseHeadManager()
+    ehm = get_head_mgr()
     heads = ehm.get_all_heads(include_inactive=True)
 
     with st.expander("➕ Add New Head", expanded=False):
@@ -1699,22 +1760,24 @@ def show_expense_heads():
                         st.error(msg)
 
     if heads:
-        df = pd.DataFrame(heads)
-        st.dataframe(df[['head_name', 'description', 'is_active']], use_container_width=True, hide_index=True)
+        df = pd.DataFrame.from_records(heads, columns=_HEAD_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
         st.subheader("Toggle Status")
-        head_options = {h['head_name']: h['id'] for h in heads}
-        selected = st.selectbox("Select Head", list(head_options.keys()))
-        head_id = head_options[selected]
-        selected_head = next(h for h in heads if h['id'] == head_id)
-        current = selected_head['is_active']
-        if st.button(f"{'Disable' if current else 'Enable'} Head", use_container_width=True):
-            success, msg = ehm.toggle_active(head_id, not current)
-            if success:
-                st.success(msg)
-                st.rerun()
-            else:
-                st.error(msg)
+        picks = _narrow(heads, 'head_name', "head_search")
+        if picks:
+            labels = [h['head_name'] for h in picks]
+            idx = st.selectbox("Select Head", range(len(labels)), format_func=labels.__getitem__)
+            selected_head = picks[idx]
+            head_id = selected_head['id']
+            current = selected_head['is_active']
+            if st.button(f"{'Disable' if current else 'Enable'} Head", use_container_width=True):
+                success, msg = ehm.toggle_active(head_id, not current)
+                if success:
+                    st.success(msg)
+                    st.rerun()
+                else:
+                    st.error(msg)
     else:
         st.info("No expense heads.")
 
@@ -1724,26 +1787,28 @@ def show_expense_heads():
 # ============================================
 def show_expense_entry():
     st.header("💸 Expense Entry")
+    today = date.today()
     user = st.session_state.user
-    shift_mgr = ShiftManager()
-    exp_mgr = ExpensesManager()
-    ehm = ExpenseHeadManager()
+    shift_mgr = get_shift_mgr()
+    exp_mgr = get_expenses_mgr()
+    ehm = get_head_mgr()
 
-    if user['role'] in ['Morning User', 'Evening User', 'Night User']:
+    if user['role'] in _SHIFT_USER_ROLES:
         current = shift_mgr.get_current_shift(user['shift'])
         if not current:
             st.error(f"No open {user['shift']} shift.")
             return
         shift_id = current['id']
+        shift_options = None
     else:
-        today_shifts = shift_mgr.get_shifts_in_date_range(date.today(), date.today())
-        open_shifts = [s for s in today_shifts if s['status'] == 'open']
-        if not open_shifts:
+        try:
+            shift_options = _open_shift_options(today.isoformat())
+        except Exception as e:
+            st.error(f"Error fetching shifts: {e}")
+            return
+        if not shift_options:
             st.error("No open shifts today.")
             return
-        shift_options = {f"{s['shift_name']} ({s['opening_time']})": s['id'] for s in open_shifts}
-        selected = st.selectbox("Select Shift", list(shift_options.keys()))
-        shift_id = shift_options[selected]
 
     heads = ehm.get_all_heads(include_inactive=False)
     if not heads:
@@ -1752,12 +1817,16 @@ def show_expense_entry():
     head_dict = {h['head_name']: h['id'] for h in heads}
 
     with st.form("expense_form"):
+        # Picked inside the form so switching shift waits for the submit
+        if shift_options:
+            selected = st.selectbox("Select Shift", list(shift_options.keys()))
+            shift_id = shift_options[selected]
         col1, col2 = st.columns(2)
         with col1:
             head = st.selectbox("Expense Head*", list(head_dict.keys()))
             amount = st.number_input("Amount (PKR)*", min_value=0.0, step=100.0, format="%.2f")
         with col2:
-            exp_date = st.date_input("Date", value=date.today())
+            exp_date = st.date_input("Date", value=today)
             description = st.text_area("Description")
         submitted = st.form_submit_button("Add Expense", use_container_width=True)
         if submitted:
@@ -1781,14 +1850,18 @@ def show_expense_entry():
 
     # Edit Section
     with st.expander("✏️ Edit Existing Expense"):
-        edit_expense()
+        if st.checkbox("Load expenses for editing", key="edit_expense_on"):
+            edit_expense()
 
     st.subheader("Recent Expenses")
-    expenses = exp_mgr.get_expenses(shift_id=shift_id, limit=10)
+    try:
+        expenses = _shift_expenses(shift_id)
+    except Exception as e:
+        st.error(f"Error fetching expenses: {e}")
+        return
     if expenses:
-        df = pd.DataFrame(expenses)
-        df['head'] = df['expense_heads'].apply(lambda x: x['head_name'] if x else '')
-        st.dataframe(df[['expense_date', 'head', 'amount', 'description']], use_container_width=True, hide_index=True)
+        df = pd.DataFrame.from_records(expenses, columns=_EXPENSE_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
     else:
         st.info("No expenses recorded.")
 
@@ -1798,7 +1871,7 @@ def show_expense_entry():
 # ============================================
 def show_vendor_master():
     st.header("🏢 Vendor Master")
-    vm = VendorManager()
+    vm = get_vendor_mgr()
     vendors = vm.get_all_vendors(include_inactive=True)
 
     with st.expander("➕ Add New Vendor", expanded=False):
@@ -1832,22 +1905,24 @@ def show_vendor_master():
                         st.error(msg)
 
     if vendors:
-        df = pd.DataFrame(vendors)
-        st.dataframe(df[['vendor_name', 'contact_person', 'phone', 'current_balance', 'is_active']], use_container_width=True, hide_index=True)
+        df = pd.DataFrame.from_records(vendors, columns=_VENDOR_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
         st.subheader("Toggle Status")
-        vendor_options = {v['vendor_name']: v['id'] for v in vendors}
-        selected = st.selectbox("Select Vendor", list(vendor_options.keys()))
-        vendor_id = vendor_options[selected]
-        selected_vendor = next(v for v in vendors if v['id'] == vendor_id)
-        current = selected_vendor['is_active']
-        if st.button(f"{'Disable' if current else 'Enable'} Vendor", use_container_width=True):
-            success, msg = vm.toggle_active(vendor_id, not current)
-            if success:
-                st.success(msg)
-                st.rerun()
-            else:
-                st.error(msg)
+        picks = _narrow(vendors, 'vendor_name', "vendor_master_search")
+        if picks:
+            labels = [v['vendor_name'] for v in picks]
+            idx = st.selectbox("Select Vendor", range(len(labels)), format_func=labels.__getitem__)
+            selected_vendor = picks[idx]
+            vendor_id = selected_vendor['id']
+            current = selected_vendor['is_active']
+            if st.button(f"{'Disable' if current else 'Enable'} Vendor", use_container_width=True):
+                success, msg = vm.toggle_active(vendor_id, not current)
+                if success:
+                    st.success(msg)
+                    st.rerun()
+                else:
+                    st.error(msg)
     else:
         st.info("No vendors.")
 
@@ -1857,69 +1932,89 @@ def show_vendor_master():
 # ============================================
 def show_vendor_ledger():
     st.header("📒 Vendor Ledger")
+    today = date.today()
     user = st.session_state.user
-    vm = VendorManager()
-    shift_mgr = ShiftManager()
+    vm = get_vendor_mgr()
+    shift_mgr = get_shift_mgr()
 
     vendors = vm.get_all_vendors(include_inactive=False)
     if not vendors:
         st.info("No active vendors.")
         return
 
-    vendor_dict = {v['vendor_name']: v['id'] for v in vendors}
-    selected_vendor = st.selectbox("Select Vendor", list(vendor_dict.keys()))
-    vendor_id = vendor_dict[selected_vendor]
+    picks = _narrow(vendors, 'vendor_name', "vendor_ledger_search")
+    if not picks:
+        return
+    labels = [v['vendor_name'] for v in picks]
+    idx = st.selectbox("Select Vendor", range(len(labels)), format_func=labels.__getitem__)
+    selected_vendor = labels[idx]
+    vendor_id = picks[idx]['id']
 
     col1, col2 = st.columns(2)
     with col1:
-        start = st.date_input("From", value=date.today().replace(day=1))
+        start = st.date_input("From", value=today.replace(day=1))
     with col2:
-        end = st.date_input("To", value=date.today())
+        end = st.date_input("To", value=today)
 
     # Display Ledger
-    ledger = vm.get_vendor_ledger(vendor_id, start, end)
-    if ledger:
-        df = pd.DataFrame(ledger)
-        st.dataframe(df, use_container_width=True, hide_index=True)
-        if st.button("Export PDF", use_container_width=True):
-            pdf = generate_pdf(df, f"Ledger - {selected_vendor}", "vendor_ledger.pdf")
-            st.markdown(get_pdf_download_link(pdf, "vendor_ledger.pdf"), unsafe_allow_html=True)
+    # A failed read still leaves the entry tabs below usable
+    try:
+        df = _vendor_ledger(vendor_id, start.isoformat(), end.isoformat())
+    except Exception as e:
+        st.error(f"Error fetching vendor ledger: {e}")
     else:
-        st.info("No transactions.")
+        if not df.empty:
+            _show_ledger(df, "vendor_ledger.csv")
+            if st.button("Export PDF", use_container_width=True):
+                pdf = generate_pdf(df, f"Ledger - {selected_vendor}", "vendor_ledger.pdf")
+                st.download_button("📥 Download PDF", pdf, file_name="vendor_ledger.pdf", mime="application/pdf")
+        else:
+            st.info("No transactions.")
 
     st.divider()
 
     # Determine shift for adding transactions
-    if user['role'] in ['Morning User', 'Evening User', 'Night User']:
+    if user['role'] in _SHIFT_USER_ROLES:
         current = shift_mgr.get_current_shift(user['shift'])
         if not current:
             st.error("No open shift.")
             return
         shift_id = current['id']
+        shift_label = f"{current['shift_name']} ({current['opening_time']})"
     else:
-        today_shifts = shift_mgr.get_shifts_in_date_range(date.today(), date.today())
-        open_shifts = [s for s in today_shifts if s['status'] == 'open']
-        if not open_shifts:
+        try:
+            shift_options = _open_shift_options(today.isoformat())
+        except Exception as e:
+            st.error(f"Error fetching shifts: {e}")
+            return
+        if not shift_options:
             st.error("No open shifts.")
             return
-        shift_options = {f"{s['shift_name']} ({s['opening_time']})": s['id'] for s in open_shifts}
-        shift_choice = st.selectbox("Select Shift for Transaction", list(shift_options.keys()), key="shift_tx")
-        shift_id = shift_options[shift_choice]
+        shift_label = st.selectbox("Select Shift for Transaction", list(shift_options.keys()), key="shift_tx")
+        shift_id = shift_options[shift_label]
 
     # Tabs for different operations
     tab1, tab2, tab3, tab4 = st.tabs(["➕ Add Purchase", "💳 Add Payment", "🔄 Vendor Return", "✏️ Edit Transactions"])
 
     with tab1:
+        # Rows carry the shift they were queued under, so each open shift keeps
+        # its own batch and switching shifts never files invoices to the old one
+        pending = st.session_state.setdefault('pending_purchases', {}).setdefault((vendor_id, shift_id), [])
         with st.form("purchase_form"):
             col1, col2 = st.columns(2)
             with col1:
                 inv = st.text_input("Invoice")
                 amt = st.number_input("Amount*", min_value=0.0, step=100.0, format="%.2f")
             with col2:
-                pdate = st.date_input("Date", value=date.today())
+                pdate = st.date_input("Date", value=today)
                 due = st.date_input("Due Date", value=None)
                 notes = st.text_area("Notes")
-            if st.form_submit_button("Add Purchase", use_container_width=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                add_now = st.form_submit_button("Add Purchase", use_container_width=True)
+            with col2:
+                queue = st.form_submit_button("Add to Batch", use_container_width=True)
+            if add_now or queue:
                 if amt <= 0:
                     st.error("Amount must be > 0.")
                 else:
@@ -1933,12 +2028,35 @@ def show_vendor_ledger():
                         'due_date': due.isoformat() if due else None,
                         'notes': notes
                     }
-                    success, msg = vm.add_purchase(data, user['id'])
+                    if queue:
+                        pending.append(data)
+                    else:
+                        success, msg = vm.add_purchase(data, user['id'])
+                        if success:
+                            st.success(msg)
+                            st.rerun()
+                        else:
+                            st.error(msg)
+
+        # Queued invoices are saved in one insert and one rerun
+        if pending:
+            queued = pd.DataFrame.from_records(pending, columns=('purchase_date', 'invoice_number', 'amount', 'notes'))
+            queued.insert(0, 'shift', shift_label)
+            st.dataframe(queued, use_container_width=True, hide_index=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(f"Save {len(pending)} Purchases", use_container_width=True):
+                    success, msg = vm.add_purchases(pending, user['id'])
                     if success:
+                        pending.clear()
                         st.success(msg)
                         st.rerun()
                     else:
                         st.error(msg)
+            with col2:
+                if st.button("Clear Batch", use_container_width=True):
+                    pending.clear()
+                    st.rerun()
 
     with tab2:
         with st.form("payment_form"):
@@ -1946,7 +2064,7 @@ def show_vendor_ledger():
             with col1:
                 amt = st.number_input("Amount*", min_value=0.0, step=100.0, format="%.2f")
             with col2:
-                pdate = st.date_input("Date", value=date.today())
+                pdate = st.date_input("Date", value=today)
                 notes = st.text_area("Notes")
             if st.form_submit_button("Add Payment", use_container_width=True):
                 if amt <= 0:
@@ -1973,7 +2091,7 @@ def show_vendor_ledger():
             with col1:
                 amt = st.number_input("Return Amount*", min_value=0.0, step=100.0, format="%.2f")
             with col2:
-                rdate = st.date_input("Date", value=date.today())
+                rdate = st.date_input("Date", value=today)
                 reason = st.text_area("Reason")
             if st.form_submit_button("Record Return", use_container_width=True):
                 if amt <= 0:
@@ -1997,12 +2115,14 @@ def show_vendor_ledger():
     with tab4:
         st.subheader("Edit Transactions")
         edit_tab = st.radio("Select Type", ["Purchase", "Payment", "Return"], horizontal=True)
-        if edit_tab == "Purchase":
-            edit_purchase(vendor_id)
-        elif edit_tab == "Payment":
-            edit_payment(vendor_id)
-        else:
-            edit_return(vendor_id)
+        # Tab contents run on every rerun whichever tab is showing
+        if st.checkbox("Load entries for editing", key="edit_vendor_on"):
+            if edit_tab == "Purchase":
+                edit_purchase(vendor_id)
+            elif edit_tab == "Payment":
+                edit_payment(vendor_id)
+            else:
+                edit_return(vendor_id)
 
 
 # ============================================
@@ -2010,27 +2130,30 @@ def show_vendor_ledger():
 # ============================================
 def show_personal_ledger():
     st.header("💰 Personal Ledger")
+    today = date.today()
     user = st.session_state.user
     if user['role'] not in ['Super User', 'Owner']:
         st.error("Access denied.")
         return
 
-    plm = PersonalLedgerManager()
-    shift_mgr = ShiftManager()
+    plm = get_personal_mgr()
+    shift_mgr = get_shift_mgr()
 
-    if user['role'] in ['Morning User', 'Evening User', 'Night User']:
+    if user['role'] in _SHIFT_USER_ROLES:
         current = shift_mgr.get_current_shift(user['shift'])
         if not current:
             st.error("No open shift.")
             return
         shift_id = current['id']
     else:
-        today_shifts = shift_mgr.get_shifts_in_date_range(date.today(), date.today())
-        open_shifts = [s for s in today_shifts if s['status'] == 'open']
-        if not open_shifts:
+        try:
+            shift_options = _open_shift_options(today.isoformat())
+        except Exception as e:
+            st.error(f"Error fetching shifts: {e}")
+            return
+        if not shift_options:
             st.error("No open shifts.")
             return
-        shift_options = {f"{s['shift_name']} ({s['opening_time']})": s['id'] for s in open_shifts}
         shift_choice = st.selectbox("Select Shift", list(shift_options.keys()), key="personal_shift")
         shift_id = shift_options[shift_choice]
 
@@ -2043,7 +2166,7 @@ def show_personal_ledger():
         with st.form("withdrawal"):
             amt = st.number_input("Amount*", min_value=0.0, step=100.0, format="%.2f")
             desc = st.text_area("Description")
-            tdate = st.date_input("Date", value=date.today())
+            tdate = st.date_input("Date", value=today)
             if st.form_submit_button("Add Withdrawal", use_container_width=True):
                 if amt <= 0:
                     st.error("Amount must be > 0.")
@@ -2067,7 +2190,7 @@ def show_personal_ledger():
         with st.form("investment"):
             amt = st.number_input("Amount*", min_value=0.0, step=100.0, format="%.2f")
             desc = st.text_area("Description")
-            tdate = st.date_input("Date", value=date.today())
+            tdate = st.date_input("Date", value=today)
             if st.form_submit_button("Add Investment", use_container_width=True):
                 if amt <= 0:
                     st.error("Amount must be > 0.")
@@ -2088,13 +2211,14 @@ def show_personal_ledger():
                         st.error(msg)
 
     with tab3:
-        edit_personal_transaction()
+        if st.checkbox("Load transactions for editing", key="edit_personal_on"):
+            edit_personal_transaction()
 
     st.subheader("Recent Transactions")
-    trans = plm.get_transactions(start_date=date.today().replace(day=1), end_date=date.today(), limit=20)
+    trans = plm.get_transactions(start_date=today.replace(day=1), end_date=today, limit=20)
     if trans:
-        df = pd.DataFrame(trans)
-        st.dataframe(df[['transaction_date', 'transaction_type', 'amount', 'description']], use_container_width=True, hide_index=True)
+        df = pd.DataFrame.from_records(trans, columns=_TRANSACTION_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
     else:
         st.info("No transactions.")
 
@@ -2102,91 +2226,126 @@ def show_personal_ledger():
 # ============================================
 # REPORTS (with filter by head)
 # ============================================
-def show_reports():
-    st.header("📊 Reports")
-    reports = ReportsManager()
-
-    col1, col2 = st.columns(2)
-    with col1:
-        start = st.date_input("Start", value=date.today().replace(day=1))
-    with col2:
-        end = st.date_input("End", value=date.today())
-
-    rtype = st.selectbox("Report Type", ["Sales", "Expenses", "Vendor Ledger", "Personal Ledger", "Shift Summary"])
+def _render_sales_report(start: date, end: date):
+    df = get_reports_mgr().get_sales_report(start, end, st.session_state.user)
+    if not df.empty:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        total = df['amount'].sum()
+        st.metric("Total Sales", f"PKR {total:,.2f}")
+        if st.button("Export PDF", use_container_width=True):
+            pdf = generate_pdf(df, f"Sales {start} to {end}", "sales.pdf")
+            st.download_button("📥 Download PDF", pdf, file_name="sales.pdf", mime="application/pdf")
+    else:
+        st.info("No data.")
 
-    if rtype == "Sales":
-        df = reports.get_sales_report(start, end, st.session_state.user)
-        if not df.empty:
-            st.dataframe(df, use_container_width=True, hide_index=True)
-            total = df['amount'].sum()
-            st.metric("Total Sales", f"PKR {total:,.2f}")
-            if st.button("Export PDF", use_container_width=True):
-                pdf = generate_pdf(df, f"Sales {start} to {end}", "sales.pdf")
-                st.markdown(get_pdf_download_link(pdf, "sales.pdf"), unsafe_allow_html=True)
-        else:
-            st.info("No data.")
+def _render_expenses_report(start: date, end: date):
+    try:
+        df = _expenses_report(start.isoformat(), end.isoformat())
+    except Exception as e:
+        st.error(f"Error fetching expenses report: {e}")
+        return
+    if not df.empty:
+        heads = df['head_name'].cat.categories.tolist() if 'head_name' in df.columns else []
+        selected = st.multiselect("Filter by Head", heads, default=heads)
+        # Every head selected is the default; skip the mask and copy
+        if selected and len(selected) != len(heads):
+            df = df[df['head_name'].isin(selected)]
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        total = df['amount'].sum()
+        st.metric("Total Expenses", f"PKR {total:,.2f}")
+        if st.button("Export PDF", use_container_width=True):
+            pdf = generate_pdf(df, f"Expenses {start} to {end}", "expenses.pdf")
+            st.download_button("📥 Download PDF", pdf, file_name="expenses.pdf", mime="application/pdf")
+    else:
+        st.info("No data.")
 
-    elif rtype == "Expenses":
-        df = reports.get_expenses_report(start, end)
+def _render_vendor_ledger_report(start: date, end: date):
+    vm = get_vendor_mgr()
+    vendors = vm.get_all_vendors(include_inactive=False)
+    if vendors:
+        picks = _narrow(vendors, 'vendor_name', "report_vendor_search")
+        if not picks:
+            return
+        labels = [v['vendor_name'] for v in picks]
+        idx = st.selectbox("Select Vendor", range(len(labels)), format_func=labels.__getitem__)
+        selected = labels[idx]
+        vendor_id = picks[idx]['id']
+        try:
+            df = _vendor_ledger(vendor_id, start.isoformat(), end.isoformat())
+        except Exception as e:
+            st.error(f"Error fetching vendor ledger: {e}")
+            return
         if not df.empty:
-            heads = df['head_name'].unique() if 'head_name' in df.columns else []
-            selected = st.multiselect("Filter by Head", heads, default=heads)
-            if selected:
-                df = df[df['head_name'].isin(selected)]
-            st.dataframe(df, use_container_width=True, hide_index=True)
-            total = df['amount'].sum()
-            st.metric("Total Expenses", f"PKR {total:,.2f}")
+            _show_ledger(df, "vendor_ledger.csv")
             if st.button("Export PDF", use_container_width=True):
-                pdf = generate_pdf(df, f"Expenses {start} to {end}", "expenses.pdf")
-                st.markdown(get_pdf_download_link(pdf, "expenses.pdf"), unsafe_allow_html=True)
-        else:
-            st.info("No data.")
-
-    elif rtype == "Vendor Ledger":
-        vm = VendorManager()
-        vendors = vm.get_all_vendors(include_inactive=False)
-        if vendors:
-            vendor_dict = {v['vendor_name']: v['id'] for v in vendors}
-            selected = st.selectbox("Select Vendor", list(vendor_dict.keys()))
-            vendor_id = vendor_dict[selected]
-            ledger = vm.get_vendor_ledger(vendor_id, start, end)
-            if ledger:
-                df = pd.DataFrame(ledger)
-                st.dataframe(df, use_container_width=True, hide_index=True)
-                if st.button("Export PDF", use_container_width=True):
-                    pdf = generate_pdf(df, f"Ledger {selected} {start} to {end}", "vendor_ledger.pdf")
-                    st.markdown(get_pdf_download_link(pdf, "vendor_ledger.pdf"), unsafe_allow_html=True)
-            else:
-                st.info("No transactions.")
-        else:
-            st.info("No vendors.")
-
-    elif rtype == "Personal Ledger":
-        plm = PersonalLedgerManager()
-        trans = plm.get_transactions(start_date=start, end_date=end)
-        if trans:
-            df = pd.DataFrame(trans)
-            st.dataframe(df, use_container_width=True, hide_index=True)
-            inv = df[df['transaction_type']=='investment']['amount'].sum()
-            wd = df[df['transaction_type']=='withdrawal']['amount'].sum()
-            st.metric("Net", f"PKR {inv - wd:,.2f}")
-            if st.button("Export PDF", use_container_width=True):
-                pdf = generate_pdf(df, f"Personal Ledger {start} to {end}", "personal.pdf")
-                st.markdown(get_pdf_download_link(pdf, "personal.pdf"), unsafe_allow_html=True)
+                pdf = generate_pdf(df, f"Ledger {selected} {start} to {end}", "vendor_ledger.pdf")
+                st.download_button("📥 Download PDF", pdf, file_name="vendor_ledger.pdf", mime="application/pdf")
         else:
             st.info("No transactions.")
+    else:
+        st.info("No vendors.")
 
-    elif rtype == "Shift Summary":
-        shift_mgr = ShiftManager()
-        shifts = shift_mgr.get_shifts_in_date_range(start, end, st.session_state.user)
-        if shifts:
-            df = pd.DataFrame(shifts)
-            st.dataframe(df, use_container_width=True, hide_index=True)
-            if st.button("Export PDF", use_container_width=True):
-                pdf = generate_pdf(df, f"Shifts {start} to {end}", "shifts.pdf")
-                st.markdown(get_pdf_download_link(pdf, "shifts.pdf"), unsafe_allow_html=True)
-        else:
-            st.info("No shifts.")
+# Below a few hundred rows a plain loop beats the groupby set-up cost
+def _totals_by_type(rows: List[Dict]) -> Dict[str, float]:
+    sums = {}
+    for r in rows:
+        sums[r['transaction_type']] = sums.get(r['transaction_type'], 0) + r['amount']
+    return sums
+
+def _render_personal_ledger_report(start: date, end: date):
+    try:
+        trans = _personal_transactions(start.isoformat(), end.isoformat())
+    except Exception as e:
+        st.error(f"Error fetching personal transactions: {e}")
+        return
+    if trans:
+        df = pd.DataFrame.from_records(trans, columns=_TRANSACTION_COLS)
+        df['transaction_type'] = df['transaction_type'].astype('category')
+        _show_ledger(df, "personal.csv")
+        sums = _totals_by_type(trans) if len(trans) < 500 else \
+            df.groupby('transaction_type', sort=False, observed=True)['amount'].sum()
+        inv = sums.get('investment', 0)
+        wd = sums.get('withdrawal', 0)
+        st.metric("Net", f"PKR {inv - wd:,.2f}")
+        if st.button("Export PDF", use_container_width=True):
+            pdf = generate_pdf(df, f"Personal Ledger {start} to {end}", "personal.pdf")
+            st.download_button("📥 Download PDF", pdf, file_name="personal.pdf", mime="application/pdf")
+    else:
+        st.info("No transactions.")
+
+def _render_shift_report(start: date, end: date):
+    shift_mgr = get_shift_mgr()
+    shifts = shift_mgr.get_shifts_in_date_range(start, end, st.session_state.user)
+    if shifts:
+        df = pd.DataFrame.from_records(shifts, columns=_SHIFT_COLS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        if st.button("Export PDF", use_container_width=True):
+            pdf = generate_pdf(df, f"Shifts {start} to {end}", "shifts.pdf")
+            st.download_button("📥 Download PDF", pdf, file_name="shifts.pdf", mime="application/pdf")
+    else:
+        st.info("No shifts.")
+
+# Report Type choices, in menu order
+_REPORTS = {
+    "Sales": _render_sales_report,
+    "Expenses": _render_expenses_report,
+    "Vendor Ledger": _render_vendor_ledger_report,
+    "Personal Ledger": _render_personal_ledger_report,
+    "Shift Summary": _render_shift_report,
+}
+
+def show_reports():
+    st.header("📊 Reports")
+    today = date.today()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.date_input("Start", value=today.replace(day=1))
+    with col2:
+        end = st.date_input("End", value=today)
+
+    rtype = st.selectbox("Report Type", tuple(_REPORTS))
+    _REPORTS[rtype](start, end)
 
 
 # ============================================
@@ -2194,12 +2353,13 @@ def show_reports():
 # ============================================
 def show_profit_loss():
     st.header("📈 Profit & Loss Statement")
+    today = date.today()
 
     col1, col2 = st.columns(2)
     with col1:
-        start = st.date_input("From", value=date.today().replace(day=1))
+        start = st.date_input("From", value=today.replace(day=1))
     with col2:
-        end = st.date_input("To", value=date.today())
+        end = st.date_input("To", value=today)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -2207,9 +2367,17 @@ def show_profit_loss():
     with col2:
         cogs = st.number_input("Cost of Goods Sold (PKR)", min_value=0.0, step=1000.0, format="%.2f")
 
+    # Remember which range was calculated so the Export click, which reruns
+    # the page, still has the statement; a new date range drops it.
+    pl_key = (start.isoformat(), end.isoformat())
     if st.button("Calculate P&L", use_container_width=True):
-        reports = ReportsManager()
-        exp_df = reports.get_expenses_report(start, end)
+        st.session_state.pl_range = pl_key
+    if st.session_state.get('pl_range') == pl_key:
+        try:
+            exp_df = _expenses_report(*pl_key)
+        except Exception as e:
+            st.error(f"Error fetching expenses report: {e}")
+            return
         total_exp = exp_df['amount'].sum() if not exp_df.empty else 0
 
         gross = sales - cogs
@@ -2234,7 +2402,7 @@ def show_profit_loss():
             }
             df = pd.DataFrame(data)
             pdf = generate_pdf(df, f"P&L {start} to {end}", "pnl.pdf")
-            st.markdown(get_pdf_download_link(pdf, "pnl.pdf"), unsafe_allow_html=True)
+            st.download_button("📥 Download PDF", pdf, file_name="pnl.pdf", mime="application/pdf")
 
 
 # ============================================
@@ -2268,14 +2436,16 @@ def show_pdf_settings():
 def show_my_shift():
     st.header("🕒 My Shift")
     user = st.session_state.user
-    shift_mgr = ShiftManager()
-    current = shift_mgr.get_current_shift(user['shift'])
+    shift_mgr = get_shift_mgr()
+    # Open shift, its summary and expected cash in one round trip
+    dashboard = shift_mgr.get_dashboard(user['shift'])
+    current = dashboard.get('current')
     if current:
         st.success(f"Your {user['shift']} shift is OPEN")
         st.write(f"Opened: {current['opening_date']} {current['opening_time']}")
         st.write(f"Opening Cash: PKR {current['opening_cash']:,.2f}")
 
-        summary = shift_mgr.get_shift_summary(current['id'])
+        summary = dashboard['summary']
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Sales", f"PKR {summary['sales']:,.2f}")
@@ -2289,7 +2459,7 @@ def show_my_shift():
         with col2:
             st.metric("Investments", f"PKR {summary['investments']:,.2f}")
         with col3:
-            expected = shift_mgr.calculate_expected_cash(current['id'])
+            expected = float(dashboard['expected'] or 0)
             st.metric("Expected Cash", f"PKR {expected:,.2f}")
 
         with st.form("close_my_shift"):
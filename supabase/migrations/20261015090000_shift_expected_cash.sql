@@ -0,0 +1,17 @@
+-- Expected drawer cash for a shift, computed in one round trip.
+-- Mirrors ShiftManager.calculate_expected_cash: opening cash (10000 when the
+-- shift row is missing) + sales - expenses - vendor payments - withdrawals + investments.
+CREATE OR REPLACE FUNCTION shift_expected_cash(p_shift_id uuid)
+RETURNS numeric
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE((SELECT opening_cash FROM shifts WHERE id = p_shift_id), 10000)
+         + COALESCE((SELECT SUM(amount) FROM sales WHERE shift_id = p_shift_id), 0)
+         - COALESCE((SELECT SUM(amount) FROM expenses WHERE shift_id = p_shift_id), 0)
+         - COALESCE((SELECT SUM(amount) FROM vendor_payments WHERE shift_id = p_shift_id), 0)
+         - COALESCE((SELECT SUM(amount) FROM personal_transactions
+                     WHERE shift_id = p_shift_id AND transaction_type = 'withdrawal'), 0)
+         + COALESCE((SELECT SUM(amount) FROM personal_transactions
+                     WHERE shift_id = p_shift_id AND transaction_type = 'investment'), 0);
+$$;
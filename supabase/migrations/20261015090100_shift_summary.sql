@@ -0,0 +1,21 @@
+-- Per-shift totals used by ShiftManager.get_shift_summary, returned as one JSON object.
+CREATE OR REPLACE FUNCTION shift_summary(p_shift_id uuid)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'sales',            (SELECT COALESCE(SUM(amount), 0) FROM sales WHERE shift_id = p_shift_id),
+        'expenses',         (SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE shift_id = p_shift_id),
+        'vendor_purchases', (SELECT COALESCE(SUM(amount), 0) FROM vendor_purchases WHERE shift_id = p_shift_id),
+        'vendor_payments',  (SELECT COALESCE(SUM(amount), 0) FROM vendor_payments WHERE shift_id = p_shift_id),
+        'withdrawals',      COALESCE(p.withdrawals, 0),
+        'investments',      COALESCE(p.investments, 0)
+    )
+    FROM (
+        SELECT SUM(amount) FILTER (WHERE transaction_type = 'withdrawal') AS withdrawals,
+               SUM(amount) FILTER (WHERE transaction_type <> 'withdrawal') AS investments
+        FROM personal_transactions
+        WHERE shift_id = p_shift_id
+    ) p;
+$$;
@@ -0,0 +1,14 @@
+-- Net owner balance (investments - withdrawals) as a single scalar.
+CREATE OR REPLACE FUNCTION personal_balance()
+RETURNS numeric
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'investment'), 0)
+         - COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'withdrawal'), 0)
+    FROM personal_transactions;
+$$;
+
+-- Lets the aggregate above be answered from the index alone.
+CREATE INDEX IF NOT EXISTS idx_personal_transactions_type_amount
+    ON personal_transactions (transaction_type) INCLUDE (amount);
@@ -0,0 +1,49 @@
+-- Vendor ledger for a date range: purchases, payments and returns merged,
+-- with the running balance (opening_balance + debits - credits) computed
+-- by a window function. Rows come back oldest first.
+CREATE OR REPLACE FUNCTION vendor_ledger(p_vendor_id uuid, p_start date, p_end date)
+RETURNS TABLE (
+    date date,
+    type text,
+    invoice text,
+    debit numeric,
+    credit numeric,
+    notes text,
+    shift text,
+    balance numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT t.entry_date,
+           t.entry_type,
+           t.invoice,
+           t.debit,
+           t.credit,
+           t.notes,
+           COALESCE(s.shift_name, ''),
+           COALESCE((SELECT opening_balance FROM vendors WHERE id = p_vendor_id), 0)
+             + SUM(t.debit - t.credit) OVER (
+                   ORDER BY t.entry_date, t.sort_key, t.entry_time
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+               )
+    FROM (
+        SELECT purchase_date AS entry_date, 1 AS sort_key, purchase_time AS entry_time,
+               'Purchase' AS entry_type, COALESCE(invoice_number, '') AS invoice,
+               amount AS debit, 0::numeric AS credit, COALESCE(notes, '') AS notes, shift_id
+        FROM vendor_purchases
+        WHERE vendor_id = p_vendor_id AND purchase_date BETWEEN p_start AND p_end
+        UNION ALL
+        SELECT payment_date, 2, payment_time,
+               'Payment', '', 0, amount, COALESCE(notes, ''), shift_id
+        FROM vendor_payments
+        WHERE vendor_id = p_vendor_id AND payment_date BETWEEN p_start AND p_end
+        UNION ALL
+        SELECT return_date, 3, return_time,
+               'Return', '', 0, amount, 'Return: ' || COALESCE(reason, ''), shift_id
+        FROM vendor_returns
+        WHERE vendor_id = p_vendor_id AND return_date BETWEEN p_start AND p_end
+    ) t
+    LEFT JOIN shifts s ON s.id = t.shift_id
+    ORDER BY t.entry_date, t.sort_key, t.entry_time;
+$$;
@@ -0,0 +1,5 @@
+-- Covering index for UserManager.authenticate: the username lookup, the
+-- password/is_active filters and the selected columns are all in the index,
+-- so the login query is an index-only scan.
+CREATE INDEX IF NOT EXISTS idx_users_username_auth
+    ON users (username) INCLUDE (password, is_active, id, full_name, role, shift);
@@ -0,0 +1,25 @@
+-- Indexes backing the filter + order-by chains used by the managers in app.py.
+
+-- Per-shift totals (shift_expected_cash, shift_summary)
+CREATE INDEX IF NOT EXISTS idx_sales_shift_id ON sales (shift_id);
+CREATE INDEX IF NOT EXISTS idx_expenses_shift_id ON expenses (shift_id);
+CREATE INDEX IF NOT EXISTS idx_vendor_purchases_shift_id ON vendor_purchases (shift_id);
+CREATE INDEX IF NOT EXISTS idx_vendor_payments_shift_id ON vendor_payments (shift_id);
+CREATE INDEX IF NOT EXISTS idx_personal_transactions_shift_type
+    ON personal_transactions (shift_id, transaction_type);
+
+-- Vendor lists and ledger (get_purchases / get_payments / get_returns, vendor_ledger)
+CREATE INDEX IF NOT EXISTS idx_vendor_purchases_vendor_date
+    ON vendor_purchases (vendor_id, purchase_date DESC);
+CREATE INDEX IF NOT EXISTS idx_vendor_payments_vendor_date
+    ON vendor_payments (vendor_id, payment_date DESC);
+CREATE INDEX IF NOT EXISTS idx_vendor_returns_vendor_date
+    ON vendor_returns (vendor_id, return_date DESC);
+
+-- Personal ledger (get_transactions filtered by type, ordered by date)
+CREATE INDEX IF NOT EXISTS idx_personal_transactions_type_date
+    ON personal_transactions (transaction_type, transaction_date DESC);
+
+-- Open shift lookup (get_current_shift)
+CREATE INDEX IF NOT EXISTS idx_shifts_name_status_date
+    ON shifts (shift_name, status, opening_date DESC);
@@ -0,0 +1,45 @@
+-- Keep vendors.current_balance in step with the ledger tables so balance
+-- reads are a column fetch instead of a ledger scan.
+-- Purchases raise what we owe (+1); payments and returns lower it (-1).
+CREATE OR REPLACE FUNCTION trg_vendor_bal()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    direction numeric := TG_ARGV[0]::numeric;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE vendors
+           SET current_balance = current_balance - direction * OLD.amount
+         WHERE id = OLD.vendor_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE vendors
+           SET current_balance = current_balance + direction * NEW.amount
+         WHERE id = NEW.vendor_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS vendor_purchases_balance ON vendor_purchases;
+CREATE TRIGGER vendor_purchases_balance
+    AFTER INSERT OR UPDATE OF amount, vendor_id OR DELETE ON vendor_purchases
+    FOR EACH ROW EXECUTE FUNCTION trg_vendor_bal(1);
+
+DROP TRIGGER IF EXISTS vendor_payments_balance ON vendor_payments;
+CREATE TRIGGER vendor_payments_balance
+    AFTER INSERT OR UPDATE OF amount, vendor_id OR DELETE ON vendor_payments
+    FOR EACH ROW EXECUTE FUNCTION trg_vendor_bal(-1);
+
+DROP TRIGGER IF EXISTS vendor_returns_balance ON vendor_returns;
+CREATE TRIGGER vendor_returns_balance
+    AFTER INSERT OR UPDATE OF amount, vendor_id OR DELETE ON vendor_returns
+    FOR EACH ROW EXECUTE FUNCTION trg_vendor_bal(-1);
+
+-- Bring existing balances in line with the ledger once.
+UPDATE vendors v
+   SET current_balance = v.opening_balance
+       + COALESCE((SELECT SUM(amount) FROM vendor_purchases WHERE vendor_id = v.id), 0)
+       - COALESCE((SELECT SUM(amount) FROM vendor_payments WHERE vendor_id = v.id), 0)
+       - COALESCE((SELECT SUM(amount) FROM vendor_returns WHERE vendor_id = v.id), 0);
@@ -0,0 +1,22 @@
+-- Usernames are unique; UserManager.create_user relies on the
+-- unique_violation (23505) from this index instead of a pre-check query.
+--
+-- Precondition: no two users share a username. The old pre-check in
+-- create_user was racy, so check first and name the offenders rather than
+-- fail inside CREATE INDEX. Duplicates are rows other tables point at
+-- (created_by, opened_by, ...), so resolve them by hand, then re-run.
+DO $$
+DECLARE
+    dupes text;
+BEGIN
+    SELECT string_agg(format('%L (%s rows)', username, n), ', ' ORDER BY username)
+      INTO dupes
+      FROM (SELECT username, count(*) AS n FROM users GROUP BY username HAVING count(*) > 1) d;
+    IF dupes IS NOT NULL THEN
+        RAISE EXCEPTION 'users.username has duplicates: %', dupes
+            USING HINT = 'Rename the extra accounts so each username is unique, then re-run this migration.';
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_key ON users (username);
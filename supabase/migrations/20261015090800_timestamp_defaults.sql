@@ -0,0 +1,23 @@
+-- created_at / updated_at are owned by the database: DEFAULT now() on insert
+-- and the moddatetime trigger on every update. The app no longer sends them.
+CREATE EXTENSION IF NOT EXISTS moddatetime WITH SCHEMA extensions;
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'users', 'shifts', 'expense_heads', 'vendors', 'vendor_purchases',
+        'vendor_payments', 'vendor_returns', 'personal_transactions', 'sales', 'expenses'
+    ]
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN created_at SET DEFAULT now(), '
+            'ALTER COLUMN updated_at SET DEFAULT now()', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS set_updated_at ON %I', t);
+        EXECUTE format(
+            'CREATE TRIGGER set_updated_at BEFORE UPDATE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION extensions.moddatetime(updated_at)', t);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,110 @@
+-- Running per-shift totals kept up to date by row triggers, so expected cash
+-- is a single-row lookup instead of four aggregate scans.
+CREATE TABLE IF NOT EXISTS shift_totals (
+    shift_id        uuid PRIMARY KEY REFERENCES shifts(id) ON DELETE CASCADE,
+    sales           numeric NOT NULL DEFAULT 0,
+    expenses        numeric NOT NULL DEFAULT 0,
+    vendor_payments numeric NOT NULL DEFAULT 0,
+    withdrawals     numeric NOT NULL DEFAULT 0,
+    investments     numeric NOT NULL DEFAULT 0
+);
+
+-- Add p_amount to the total named by p_kind; unknown kinds are ignored.
+CREATE OR REPLACE FUNCTION shift_totals_bump(p_shift_id uuid, p_kind text, p_amount numeric)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO shift_totals AS t (shift_id, sales, expenses, vendor_payments, withdrawals, investments)
+    VALUES (
+        p_shift_id,
+        CASE WHEN p_kind = 'sale' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'expense' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'vendor_payment' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'withdrawal' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'investment' THEN p_amount ELSE 0 END
+    )
+    ON CONFLICT (shift_id) DO UPDATE
+       SET sales           = t.sales + EXCLUDED.sales,
+           expenses        = t.expenses + EXCLUDED.expenses,
+           vendor_payments = t.vendor_payments + EXCLUDED.vendor_payments,
+           withdrawals     = t.withdrawals + EXCLUDED.withdrawals,
+           investments     = t.investments + EXCLUDED.investments;
+$$;
+
+-- TG_ARGV[0] is the kind; personal transactions take it from transaction_type.
+CREATE OR REPLACE FUNCTION trg_shift_totals()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    kind text := TG_ARGV[0];
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.shift_id IS NOT NULL THEN
+        PERFORM shift_totals_bump(
+            OLD.shift_id,
+            COALESCE(to_jsonb(OLD) ->> 'transaction_type', kind),
+            -OLD.amount);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.shift_id IS NOT NULL THEN
+        PERFORM shift_totals_bump(
+            NEW.shift_id,
+            COALESCE(to_jsonb(NEW) ->> 'transaction_type', kind),
+            NEW.amount);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sales_shift_totals ON sales;
+CREATE TRIGGER sales_shift_totals
+    AFTER INSERT OR UPDATE OF amount, shift_id OR DELETE ON sales
+    FOR EACH ROW EXECUTE FUNCTION trg_shift_totals('sale');
+
+DROP TRIGGER IF EXISTS expenses_shift_totals ON expenses;
+CREATE TRIGGER expenses_shift_totals
+    AFTER INSERT OR UPDATE OF amount, shift_id OR DELETE ON expenses
+    FOR EACH ROW EXECUTE FUNCTION trg_shift_totals('expense');
+
+DROP TRIGGER IF EXISTS vendor_payments_shift_totals ON vendor_payments;
+CREATE TRIGGER vendor_payments_shift_totals
+    AFTER INSERT OR UPDATE OF amount, shift_id OR DELETE ON vendor_payments
+    FOR EACH ROW EXECUTE FUNCTION trg_shift_totals('vendor_payment');
+
+DROP TRIGGER IF EXISTS personal_transactions_shift_totals ON personal_transactions;
+CREATE TRIGGER personal_transactions_shift_totals
+    AFTER INSERT OR UPDATE OF amount, shift_id, transaction_type OR DELETE ON personal_transactions
+    FOR EACH ROW EXECUTE FUNCTION trg_shift_totals('personal');
+
+-- Fill totals for existing shifts once.
+INSERT INTO shift_totals (shift_id, sales, expenses, vendor_payments, withdrawals, investments)
+SELECT s.id,
+       COALESCE((SELECT SUM(amount) FROM sales WHERE shift_id = s.id), 0),
+       COALESCE((SELECT SUM(amount) FROM expenses WHERE shift_id = s.id), 0),
+       COALESCE((SELECT SUM(amount) FROM vendor_payments WHERE shift_id = s.id), 0),
+       COALESCE((SELECT SUM(amount) FROM personal_transactions
+                 WHERE shift_id = s.id AND transaction_type = 'withdrawal'), 0),
+       COALESCE((SELECT SUM(amount) FROM personal_transactions
+                 WHERE shift_id = s.id AND transaction_type = 'investment'), 0)
+FROM shifts s
+ON CONFLICT (shift_id) DO UPDATE
+   SET sales           = EXCLUDED.sales,
+       expenses        = EXCLUDED.expenses,
+       vendor_payments = EXCLUDED.vendor_payments,
+       withdrawals     = EXCLUDED.withdrawals,
+       investments     = EXCLUDED.investments;
+
+-- Expected cash now reads the running totals.
+CREATE OR REPLACE FUNCTION shift_expected_cash(p_shift_id uuid)
+RETURNS numeric
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE((SELECT opening_cash FROM shifts WHERE id = p_shift_id), 10000)
+         + COALESCE(t.sales, 0)
+         - COALESCE(t.expenses, 0)
+         - COALESCE(t.vendor_payments, 0)
+         - COALESCE(t.withdrawals, 0)
+         + COALESCE(t.investments, 0)
+    FROM (SELECT p_shift_id AS shift_id) k
+    LEFT JOIN shift_totals t USING (shift_id);
+$$;
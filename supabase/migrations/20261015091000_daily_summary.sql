@@ -0,0 +1,24 @@
+-- Dashboard figures for one day, returned as one JSON object.
+-- Mirrors ReportsManager.get_daily_summary; net_cash is derived client-side.
+CREATE OR REPLACE FUNCTION daily_summary(p_date date)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_sales',      (SELECT COALESCE(SUM(amount), 0) FROM sales WHERE sale_date = p_date),
+        'total_expenses',   (SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE expense_date = p_date),
+        'vendor_payments',  (SELECT COALESCE(SUM(amount), 0) FROM vendor_payments WHERE payment_date = p_date),
+        'withdrawals',      COALESCE(p.withdrawals, 0),
+        'investments',      COALESCE(p.investments, 0),
+        'vendor_payable',   (SELECT COALESCE(SUM(current_balance), 0) FROM vendors
+                             WHERE is_active AND current_balance > 0),
+        'personal_balance', personal_balance()
+    )
+    FROM (
+        SELECT SUM(amount) FILTER (WHERE transaction_type = 'withdrawal') AS withdrawals,
+               SUM(amount) FILTER (WHERE transaction_type <> 'withdrawal') AS investments
+        FROM personal_transactions
+        WHERE transaction_date = p_date
+    ) p;
+$$;
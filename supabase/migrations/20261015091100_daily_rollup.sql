@@ -0,0 +1,129 @@
+-- Per-day running totals kept up to date by row triggers, so the dashboard
+-- summary reads one row instead of summing the day's rows on every load.
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    report_date     date PRIMARY KEY,
+    total_sales     numeric NOT NULL DEFAULT 0,
+    total_expenses  numeric NOT NULL DEFAULT 0,
+    vendor_payments numeric NOT NULL DEFAULT 0,
+    withdrawals     numeric NOT NULL DEFAULT 0,
+    investments     numeric NOT NULL DEFAULT 0
+);
+
+-- Add p_amount to the total named by p_kind for p_date.
+CREATE OR REPLACE FUNCTION daily_rollup_bump(p_date date, p_kind text, p_amount numeric)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO daily_rollup AS r (report_date, total_sales, total_expenses, vendor_payments, withdrawals, investments)
+    VALUES (
+        p_date,
+        CASE WHEN p_kind = 'sale' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'expense' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'vendor_payment' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'withdrawal' THEN p_amount ELSE 0 END,
+        CASE WHEN p_kind = 'investment' THEN p_amount ELSE 0 END
+    )
+    ON CONFLICT (report_date) DO UPDATE
+       SET total_sales     = r.total_sales + EXCLUDED.total_sales,
+           total_expenses  = r.total_expenses + EXCLUDED.total_expenses,
+           vendor_payments = r.vendor_payments + EXCLUDED.vendor_payments,
+           withdrawals     = r.withdrawals + EXCLUDED.withdrawals,
+           investments     = r.investments + EXCLUDED.investments;
+$$;
+
+-- TG_ARGV[0] is the kind, TG_ARGV[1] the row's date column. Personal
+-- transactions count as withdrawals or, otherwise, investments. Rows without
+-- a date have no day to roll into, matching the backfill below.
+CREATE OR REPLACE FUNCTION trg_daily_rollup()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    kind     text := TG_ARGV[0];
+    date_col text := TG_ARGV[1];
+    r        jsonb;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        r := to_jsonb(OLD);
+        IF r ->> date_col IS NOT NULL THEN
+            PERFORM daily_rollup_bump(
+                (r ->> date_col)::date,
+                CASE WHEN kind <> 'personal' THEN kind
+                     WHEN r ->> 'transaction_type' = 'withdrawal' THEN 'withdrawal'
+                     ELSE 'investment' END,
+                -OLD.amount);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        r := to_jsonb(NEW);
+        IF r ->> date_col IS NOT NULL THEN
+            PERFORM daily_rollup_bump(
+                (r ->> date_col)::date,
+                CASE WHEN kind <> 'personal' THEN kind
+                     WHEN r ->> 'transaction_type' = 'withdrawal' THEN 'withdrawal'
+                     ELSE 'investment' END,
+                NEW.amount);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sales_daily_rollup ON sales;
+CREATE TRIGGER sales_daily_rollup
+    AFTER INSERT OR UPDATE OF amount, sale_date OR DELETE ON sales
+    FOR EACH ROW EXECUTE FUNCTION trg_daily_rollup('sale', 'sale_date');
+
+DROP TRIGGER IF EXISTS expenses_daily_rollup ON expenses;
+CREATE TRIGGER expenses_daily_rollup
+    AFTER INSERT OR UPDATE OF amount, expense_date OR DELETE ON expenses
+    FOR EACH ROW EXECUTE FUNCTION trg_daily_rollup('expense', 'expense_date');
+
+DROP TRIGGER IF EXISTS vendor_payments_daily_rollup ON vendor_payments;
+CREATE TRIGGER vendor_payments_daily_rollup
+    AFTER INSERT OR UPDATE OF amount, payment_date OR DELETE ON vendor_payments
+    FOR EACH ROW EXECUTE FUNCTION trg_daily_rollup('vendor_payment', 'payment_date');
+
+DROP TRIGGER IF EXISTS personal_transactions_daily_rollup ON personal_transactions;
+CREATE TRIGGER personal_transactions_daily_rollup
+    AFTER INSERT OR UPDATE OF amount, transaction_date, transaction_type OR DELETE ON personal_transactions
+    FOR EACH ROW EXECUTE FUNCTION trg_daily_rollup('personal', 'transaction_date');
+
+-- Rebuild the rollup from history once.
+TRUNCATE daily_rollup;
+INSERT INTO daily_rollup (report_date, total_sales, total_expenses, vendor_payments, withdrawals, investments)
+SELECT d, SUM(s), SUM(e), SUM(vp), SUM(w), SUM(i)
+FROM (
+    SELECT sale_date AS d, amount AS s, 0 AS e, 0 AS vp, 0 AS w, 0 AS i FROM sales
+    UNION ALL
+    SELECT expense_date, 0, amount, 0, 0, 0 FROM expenses
+    UNION ALL
+    SELECT payment_date, 0, 0, amount, 0, 0 FROM vendor_payments
+    UNION ALL
+    SELECT transaction_date, 0, 0, 0,
+           CASE WHEN transaction_type = 'withdrawal' THEN amount ELSE 0 END,
+           CASE WHEN transaction_type = 'withdrawal' THEN 0 ELSE amount END
+    FROM personal_transactions
+) t
+WHERE d IS NOT NULL
+GROUP BY d;
+
+-- The dashboard summary now reads the day's rollup row.
+CREATE OR REPLACE FUNCTION daily_summary(p_date date)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_sales',      COALESCE(r.total_sales, 0),
+        'total_expenses',   COALESCE(r.total_expenses, 0),
+        'vendor_payments',  COALESCE(r.vendor_payments, 0),
+        'withdrawals',      COALESCE(r.withdrawals, 0),
+        'investments',      COALESCE(r.investments, 0),
+        'vendor_payable',   (SELECT COALESCE(SUM(current_balance), 0) FROM vendors
+                             WHERE is_active AND current_balance > 0),
+        'personal_balance', personal_balance()
+    )
+    FROM (SELECT p_date AS report_date) k
+    LEFT JOIN daily_rollup r USING (report_date);
+$$;
@@ -0,0 +1,30 @@
+-- Everything the shift user's dashboard shows, in one round trip: the open
+-- shift for p_shift_name (null when none), its expected cash, its summary
+-- and its five latest sales.
+CREATE OR REPLACE FUNCTION shift_dashboard(p_shift_name text)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT CASE WHEN s.id IS NULL THEN jsonb_build_object('current', NULL)
+           ELSE jsonb_build_object(
+               'current',      to_jsonb(s),
+               'expected',     shift_expected_cash(s.id),
+               'summary',      shift_summary(s.id),
+               'recent_sales', COALESCE((
+                   SELECT jsonb_agg(r)
+                   FROM (SELECT sale_date, invoice_number, amount
+                         FROM sales
+                         WHERE shift_id = s.id
+                         ORDER BY sale_date DESC
+                         LIMIT 5) r
+               ), '[]'::jsonb)
+           ) END
+    FROM (SELECT 1) k
+    LEFT JOIN LATERAL (
+        SELECT * FROM shifts
+        WHERE shift_name = p_shift_name AND status = 'open'
+        ORDER BY opening_date DESC
+        LIMIT 1
+    ) s ON true;
+$$;